@@ -117,6 +117,7 @@ async def _(arg: Message = CommandArg()):
         await srac.finish(
             "请输入要查询的成就的关键字，如需查询隐藏成就，请使用『查隐藏成就』"
         )
+    await srres.ensure_index("achievements")
     if achievement := srres.ResIndex["achievements"].get(name):
         message = f"{achievement.title}\n分类：{series_map[achievement.series_id]}\n描述：{achievement.desc}\n隐藏描述：{achievement.hide_desc}\n是否隐藏：{'是' if achievement.hide else '否'}"
         await srac.finish(message)
@@ -159,6 +160,7 @@ async def _(matcher: Matcher, arg: Message = CommandArg()):
 async def _(key: str = ArgPlainText()):
     if key not in series_map:
         await srah.reject("序号错误，请重新输入")
+    await srres.ensure_index("achievements")
     result: list[str] = []
     for achievement in srres.ResIndex["achievements"].values():
         if achievement.series_id == key and achievement.hide:
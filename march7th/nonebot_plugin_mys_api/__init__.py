@@ -1,6 +1,11 @@
+from nonebot import get_driver
 from nonebot.plugin import PluginMetadata
 
+from .device import device_pool
 from .api import MysApi as MysApi
+from .api import ApiResult as ApiResult
+from .api import BatchResult as BatchResult
+from .cache import response_cache as response_cache
 
 __plugin_meta__ = PluginMetadata(
     name="MysApi",
@@ -10,3 +15,10 @@ __plugin_meta__ = PluginMetadata(
         "version": "1.0",
     },
 )
+
+driver = get_driver()
+
+
+@driver.on_startup
+async def _():
+    device_pool.schedule_refill(MysApi().request_fp)
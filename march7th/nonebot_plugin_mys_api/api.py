@@ -3,15 +3,22 @@ import time
 import uuid
 import random
 import string
+import asyncio
 import hashlib
 from copy import deepcopy
-from typing import Any, Union, Literal, Optional
+from urllib.parse import urlsplit
+from collections.abc import Awaitable
+from typing import Any, Union, Literal, Optional, NamedTuple
 
 from nonebot import get_driver
 from nonebot.log import logger
 from nonebot.drivers import Driver, Request, HTTPClientMixin
 
+from .device import device_pool
+from .cache import response_cache
 from .config import plugin_config
+from .ratelimit import rate_limiter
+from .retry import retry_budget, backoff_delay, get_circuit_breaker
 
 RECOGNIZE_SERVER = {
     "1": "prod_gf_cn",
@@ -106,6 +113,38 @@ def random_text(length: int) -> str:
     return "".join(random.sample(string.ascii_lowercase + string.digits, length))
 
 
+class ApiResult(NamedTuple):
+    """
+    batch 中单个接口调用的结果
+    """
+
+    data: Optional[dict] = None
+    """
+    调用成功时的数据
+    """
+    retcode: Optional[int] = None
+    """
+    接口返回的错误码，成功或请求失败时为 None
+    """
+
+    @classmethod
+    def from_response(cls, response: Union[dict, int, None]) -> "ApiResult":
+        if isinstance(response, int):
+            return cls(retcode=response)
+        return cls(data=response or None)
+
+
+class BatchResult(NamedTuple):
+    results: list[ApiResult]
+    """
+    按调用顺序排列的结果
+    """
+    device: Optional[tuple[str, str]]
+    """
+    更换后的 (device_id, device_fp)，未更换时为 None
+    """
+
+
 class MysApi:
     driver: HTTPClientMixin
     cookie: Optional[str]
@@ -129,6 +168,10 @@ class MysApi:
         self.device_fp = device_fp
 
     async def init_device(self, device_id: Optional[str] = None) -> tuple[str, str]:
+        # use pre-generated device if no device_id is specified
+        if device_id is None and (device := device_pool.take(self.request_fp)):
+            self.device_id, self.device_fp = device
+            return device
         self.device_id = device_id if device_id is not None else str(uuid.uuid4())
         self.device_fp = await self.get_fp(self.device_id)
         return self.device_id, self.device_fp
@@ -199,7 +242,14 @@ class MysApi:
         c = md5(s)
         return f"{t},{r},{c}"
 
-    async def get_fp(self, device_id: str):
+    async def get_fp(self, device_id: str) -> str:
+        device_fp = await self.request_fp(device_id)
+        if device_fp is None:
+            logger.warning("Failed to get device fp, use random")
+            return random_hex(13).lower()
+        return device_fp
+
+    async def request_fp(self, device_id: str) -> Optional[str]:
         headers = {
             "User-Agent": USER_AGENT,
             "x-rpc-client_type": "5",
@@ -225,10 +275,10 @@ class MysApi:
         try:
             data = json.loads(response.content or "{}")
             return str(data["data"]["device_fp"])
-        except (json.JSONDecodeError, KeyError):
-            logger.warning("Failed to get device fp, use random")
+        except (json.JSONDecodeError, KeyError, TypeError):
+            logger.warning("Failed to get device fp")
             logger.warning(f"Response: {response.status_code} {response.content}")
-            return random_hex(13).lower()
+            return None
 
     async def _pass(
         self, gt: str, challenge: str, headers: dict[str, str]
@@ -475,6 +525,27 @@ class MysApi:
         logger.warning(f"Game record not found for {role_uid=} in {game_record_list}")
         return None
 
+    async def batch(self, *calls: Awaitable[Union[dict, int, None]]) -> BatchResult:
+        """
+        并发执行多个互不依赖的接口调用
+
+        调用共享此实例的 cookie 和设备信息，风控重试更换的设备对之后的请求生效
+            :param calls: 此实例的 call_mihoyo_api 或 get_game_basic_info 调用
+            :return: 按顺序排列的结果，以及更换后的 (device_id, device_fp)
+        """
+        before = (self.device_id, self.device_fp)
+        responses = await asyncio.gather(*calls)
+        for response in responses:
+            if isinstance(response, dict):
+                response.pop("new_fp", None)
+                response.pop("new_id", None)
+        results = [ApiResult.from_response(i) for i in responses]
+        # 以调用结束后实例实际使用的设备为准
+        device_id, device_fp = self.device_id, self.device_fp
+        if (device_id, device_fp) == before or not device_id or not device_fp:
+            return BatchResult(results, None)
+        return BatchResult(results, (device_id, device_fp))
+
     async def request(
         self,
         method: Literal["GET", "POST"],
@@ -483,6 +554,9 @@ class MysApi:
         params: Optional[dict[str, Any]] = None,
         body: Optional[dict[str, Any]] = None,
     ):
+        endpoint = url.split("?")[0]
+        breaker = get_circuit_breaker(urlsplit(url).netloc)
+        retry_budget.deposit()
         if method == "POST":
             request = Request(
                 "POST",
@@ -499,7 +573,40 @@ class MysApi:
                 params=params,
                 timeout=10,
             )
-        response = await self.driver.request(request)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                logger.warning(f"Mys API circuit open, skip request: {endpoint}")
+                return None
+            await rate_limiter.acquire(endpoint, headers.get("cookie"))
+            response = None
+            try:
+                response = await self.driver.request(request)
+            except Exception as e:
+                error = repr(e)
+            else:
+                error = f"status {response.status_code}"
+            if response is not None and response.status_code < 500:
+                breaker.success()
+                break
+            breaker.failure()
+            # 只重试幂等的 GET 请求
+            if (
+                method != "GET"
+                or attempt >= plugin_config.mys_api_retry_max
+                or not retry_budget.withdraw()
+            ):
+                logger.warning(f"Mys API request failed: {endpoint} {error}")
+                if response is None:
+                    return None
+                break
+            attempt += 1
+            delay = backoff_delay(attempt)
+            logger.debug(
+                f"Mys API request failed: {endpoint} {error}, "
+                f"retry {attempt} after {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
         try:
             data = json.loads(response.content or "{}")
         except json.JSONDecodeError:
@@ -521,6 +628,7 @@ class MysApi:
         ],
         role_uid: str = "0",
         extra_headers: Optional[dict[str, Any]] = None,
+        use_cache: bool = True,
         **kwargs,
     ) -> Union[dict, int, None]:
         # cookie check
@@ -615,6 +723,13 @@ class MysApi:
                     )
                 if params is None:
                     params = {"role_id": role_uid, "server": server_id}
+            # return cached response
+            cache_key = response_cache.make_key(
+                api, role_uid, body if is_post else params
+            )
+            if use_cache and (cached := response_cache.get(cache_key)) is not None:
+                logger.debug(f"Mys API {api} cache hit")
+                return cached
             # generate headers
             if not headers:
                 headers = await self.generate_headers(
@@ -694,6 +809,10 @@ class MysApi:
                 else:
                     logger.debug(f"Mys API {api} response: {data}")
                     data = dict(data["data"])
+                    response_cache.set(cache_key, data)
+                    if is_post:
+                        # data of this role may be changed
+                        response_cache.invalidate(role_uid=role_uid)
                     if new_fp:
                         data["new_fp"] = new_fp
                     if new_id:
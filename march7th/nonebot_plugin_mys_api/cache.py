@@ -0,0 +1,91 @@
+import time
+from copy import deepcopy
+from typing import Any, Optional
+from collections import OrderedDict
+
+from .config import plugin_config
+
+CacheKey = tuple[str, str, tuple[tuple[str, str], ...]]
+
+# 签到等有副作用的接口不缓存
+NO_CACHE_APIS = {"sr_sign"}
+
+
+class ResponseCache:
+    """
+    米游社 API 响应缓存
+
+    以 (接口, 角色 UID, 参数) 为键缓存成功的响应，有效期按接口设置，
+    超出数量上限时淘汰最久未使用的响应。
+    """
+
+    def __init__(self, ttl: dict[str, int], max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[CacheKey, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_ttl(self, api: str) -> int:
+        if api in NO_CACHE_APIS:
+            return 0
+        return self.ttl.get(api, 0)
+
+    @staticmethod
+    def make_key(
+        api: str, role_uid: str, params: Optional[dict[str, Any]] = None
+    ) -> CacheKey:
+        return (
+            api,
+            role_uid,
+            tuple(sorted((k, str(v)) for k, v in (params or {}).items())),
+        )
+
+    def get(self, key: CacheKey) -> Optional[dict[str, Any]]:
+        """
+        获取未过期的响应，返回副本
+        """
+        if self.get_ttl(key[0]) <= 0:
+            return None
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return deepcopy(entry[1])
+
+    def set(self, key: CacheKey, data: dict[str, Any]) -> None:
+        ttl = self.get_ttl(key[0])
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, deepcopy(data))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(
+        self, api: Optional[str] = None, role_uid: Optional[str] = None
+    ) -> None:
+        """
+        移除匹配的缓存，参数为 None 时匹配全部
+        """
+        for key in [
+            k
+            for k in self._data
+            if (api is None or k[0] == api) and (role_uid is None or k[1] == role_uid)
+        ]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+response_cache = ResponseCache(
+    plugin_config.mys_api_cache_ttl, plugin_config.mys_api_cache_size
+)
@@ -6,6 +6,31 @@ from nonebot import get_plugin_config
 
 class Config(BaseModel):
     magic_api: Optional[str] = None
+    mys_api_cache_ttl: dict[str, int] = {
+        "game_record": 600,
+        "sr_index": 300,
+        "sr_avatar_info": 300,
+        "sr_widget": 60,
+        "sr_note": 60,
+        "sr_month_info": 300,
+    }
+    mys_api_cache_size: int = 1024
+    mys_api_global_rate: float = 10
+    mys_api_global_burst: int = 20
+    mys_api_cookie_rate: float = 1
+    mys_api_cookie_burst: int = 3
+    mys_api_endpoint_rate: float = 5
+    mys_api_endpoint_burst: int = 10
+    mys_api_device_pool_size: int = 4
+    mys_api_device_pool_ttl: int = 86400
+    mys_api_breaker_threshold: int = 5
+    mys_api_breaker_recovery: float = 30
+    mys_api_retry_max: int = 2
+    mys_api_retry_backoff: float = 0.5
+    mys_api_retry_backoff_max: float = 4
+    mys_api_retry_budget_ratio: float = 0.2
+    mys_api_retry_budget_min: float = 0.5
+    mys_api_retry_budget_capacity: float = 10
 
 
 plugin_config = get_plugin_config(Config)
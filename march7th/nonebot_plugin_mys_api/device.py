@@ -0,0 +1,77 @@
+import time
+import uuid
+import asyncio
+from collections import deque
+from typing import Callable, Optional
+from collections.abc import Awaitable
+
+from nonebot.log import logger
+
+from .config import plugin_config
+
+FetchFp = Callable[[str], Awaitable[Optional[str]]]
+
+
+class DevicePool:
+    """
+    预先生成的设备指纹池
+
+    后台请求 device_fp 并保存 (device_id, device_fp)，取用时直接返回，
+    超过有效期的设备不再使用。取用后异步补充，补充失败时等待下次取用再试。
+    """
+
+    def __init__(self, size: int, ttl: int) -> None:
+        self.size = size
+        self.ttl = ttl
+        self._pool: deque[tuple[str, str, float]] = deque()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pool)
+
+    def take(self, fetch: FetchFp) -> Optional[tuple[str, str]]:
+        """
+        取出一个未过期的设备，并在后台补充
+
+        Args:
+            fetch: 根据 device_id 请求 device_fp 的函数，失败时返回 None
+
+        Returns:
+            (device_id, device_fp)，池为空时返回 None
+        """
+        now = time.monotonic()
+        device = None
+        while self._pool:
+            device_id, device_fp, expire = self._pool.popleft()
+            if expire > now:
+                device = (device_id, device_fp)
+                break
+        self.schedule_refill(fetch)
+        return device
+
+    def schedule_refill(self, fetch: FetchFp) -> None:
+        if self.size <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self.refill(fetch))
+
+    async def refill(self, fetch: FetchFp) -> None:
+        # 丢弃过期的设备
+        now = time.monotonic()
+        while self._pool and self._pool[0][2] <= now:
+            self._pool.popleft()
+        while len(self._pool) < self.size:
+            device_id = str(uuid.uuid4())
+            try:
+                device_fp = await fetch(device_id)
+            except Exception as e:
+                logger.warning(f"Failed to refill device pool: {e}")
+                return
+            if device_fp is None:
+                return
+            self._pool.append((device_id, device_fp, time.monotonic() + self.ttl))
+        logger.debug(f"Device pool refilled: {len(self._pool)}")
+
+
+device_pool = DevicePool(
+    plugin_config.mys_api_device_pool_size, plugin_config.mys_api_device_pool_ttl
+)
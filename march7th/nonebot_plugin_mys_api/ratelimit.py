@@ -0,0 +1,125 @@
+import time
+import asyncio
+import hashlib
+from typing import Optional
+from collections import OrderedDict
+
+from nonebot.log import logger
+
+from .config import plugin_config
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    令牌按速率恢复，最多积累 capacity 个。取令牌时允许透支，
+    返回需要等待的时间，等待的请求按取令牌的顺序排队。
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """
+        取一个令牌，返回需要等待的秒数
+        """
+        self.refill()
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    @property
+    def idle(self) -> bool:
+        self.refill()
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """
+    米游社请求限流
+
+    每个请求需同时取得全局、所用 cookie 和所请求接口三个令牌桶的令牌，
+    速率为 0 的桶不限制。超出速率时排队等待而不是失败。
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        global_burst: int,
+        cookie_rate: float,
+        cookie_burst: int,
+        endpoint_rate: float,
+        endpoint_burst: int,
+        max_buckets: int = 4096,
+    ) -> None:
+        self.global_bucket = (
+            TokenBucket(global_rate, global_burst) if global_rate > 0 else None
+        )
+        self.cookie_rate = cookie_rate
+        self.cookie_burst = cookie_burst
+        self.endpoint_rate = endpoint_rate
+        self.endpoint_burst = endpoint_burst
+        self.max_buckets = max_buckets
+        self._cookies: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._endpoints: dict[str, TokenBucket] = {}
+
+    def _get_cookie_bucket(self, cookie: str) -> TokenBucket:
+        # 不保存 cookie 原文
+        key = hashlib.sha256(cookie.encode()).hexdigest()
+        bucket = self._cookies.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.cookie_rate, self.cookie_burst)
+            self._cookies[key] = bucket
+            # 移除已恢复满的桶，效果与新建相同
+            while len(self._cookies) > self.max_buckets:
+                old_key, old = next(iter(self._cookies.items()))
+                if not old.idle:
+                    break
+                del self._cookies[old_key]
+        self._cookies.move_to_end(key)
+        return bucket
+
+    def _get_endpoint_bucket(self, endpoint: str) -> TokenBucket:
+        bucket = self._endpoints.get(endpoint)
+        if bucket is None:
+            bucket = TokenBucket(self.endpoint_rate, self.endpoint_burst)
+            self._endpoints[endpoint] = bucket
+        return bucket
+
+    async def acquire(self, endpoint: str, cookie: Optional[str] = None) -> None:
+        """
+        等待直到可以发送请求
+
+        Args:
+            endpoint: 接口地址，不含查询参数
+            cookie: 请求使用的 cookie
+        """
+        buckets: list[TokenBucket] = []
+        if self.global_bucket:
+            buckets.append(self.global_bucket)
+        if cookie and self.cookie_rate > 0:
+            buckets.append(self._get_cookie_bucket(cookie))
+        if self.endpoint_rate > 0:
+            buckets.append(self._get_endpoint_bucket(endpoint))
+        wait = max((bucket.reserve() for bucket in buckets), default=0)
+        if wait > 0:
+            logger.debug(f"Mys API rate limited, wait {wait:.2f}s: {endpoint}")
+            await asyncio.sleep(wait)
+
+
+rate_limiter = RateLimiter(
+    plugin_config.mys_api_global_rate,
+    plugin_config.mys_api_global_burst,
+    plugin_config.mys_api_cookie_rate,
+    plugin_config.mys_api_cookie_burst,
+    plugin_config.mys_api_endpoint_rate,
+    plugin_config.mys_api_endpoint_burst,
+)
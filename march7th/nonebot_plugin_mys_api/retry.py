@@ -0,0 +1,122 @@
+import time
+import random
+from typing import Literal
+
+from nonebot.log import logger
+
+from .config import plugin_config
+
+
+class CircuitBreaker:
+    """
+    单个域名的熔断器
+
+    连续失败达到阈值后打开，打开期间请求直接失败；经过恢复时间后进入半开状态，
+    只放行一个探测请求，成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self, host: str, threshold: int, recovery_time: float) -> None:
+        self.host = host
+        self.threshold = threshold
+        self.recovery_time = recovery_time
+        self.state: Literal["closed", "open", "half_open"] = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = 0.0
+
+    def allow(self) -> bool:
+        """
+        是否允许发送请求
+        """
+        if self.threshold <= 0 or self.state == "closed":
+            return True
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.recovery_time:
+                return False
+            self.state = "half_open"
+        elif now - self.probe_at < self.recovery_time:
+            # 半开状态下已有探测请求，超时未返回时再放行一个
+            return False
+        self.probe_at = now
+        return True
+
+    def success(self) -> None:
+        if self.state != "closed":
+            logger.info(f"Mys API circuit closed: {self.host}")
+        self.state = "closed"
+        self.failures = 0
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.threshold <= 0:
+            return
+        if self.state == "half_open" or self.failures >= self.threshold:
+            if self.state != "open":
+                logger.warning(f"Mys API circuit open: {self.host}")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """
+    重试预算
+
+    每个请求存入 ratio 个令牌，每秒另外恢复 min_rate 个，最多积累 capacity 个；
+    每次重试消耗一个令牌，令牌不足时不再重试，避免故障时重试放大请求量。
+    """
+
+    def __init__(self, ratio: float, min_rate: float, capacity: float) -> None:
+        self.ratio = ratio
+        self.min_rate = min_rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, amount: float = 0) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + amount + (now - self.updated) * self.min_rate,
+        )
+        self.updated = now
+
+    def deposit(self) -> None:
+        self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    第 attempt 次重试前的等待时间，指数退避并取随机值 (full jitter)
+    """
+    base = plugin_config.mys_api_retry_backoff * 2 ** (attempt - 1)
+    return random.uniform(0, min(plugin_config.mys_api_retry_backoff_max, base))
+
+
+_circuit_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    breaker = _circuit_breakers.get(host)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            host,
+            plugin_config.mys_api_breaker_threshold,
+            plugin_config.mys_api_breaker_recovery,
+        )
+        _circuit_breakers[host] = breaker
+    return breaker
+
+
+retry_budget = RetryBudget(
+    plugin_config.mys_api_retry_budget_ratio,
+    plugin_config.mys_api_retry_budget_min,
+    plugin_config.mys_api_retry_budget_capacity,
+)
@@ -17,7 +17,7 @@ except ModuleNotFoundError:
     from nonebot_plugin_srbind import get_user_srbind  # type: ignore
 
 from . import migrations
-from .data_source import get_srgacha, update_srgacha
+from .data_source import get_srgacha, update_srgacha, get_srgacha_rank
 
 __plugin_meta__ = PluginMetadata(
     name="StarRailGacha",
@@ -25,6 +25,7 @@ __plugin_meta__ = PluginMetadata(
     usage="""\
 导入: 导入抽卡记录 [抽卡记录URL]
 查看: 查看抽卡记录
+排行: 抽卡排行 [角色/光锥/常驻/新手]
 """,
     extra={
         "orm_version_location": migrations,
@@ -32,6 +33,7 @@ __plugin_meta__ = PluginMetadata(
         "srhelp": """\
 导入: 导入抽卡记录 [u]抽卡记录URL[/u]
 查看: 查看抽卡记录
+排行: 抽卡排行 [u]角色/光锥/常驻/新手[/u]
 """,
     },
 )
@@ -48,11 +50,19 @@ srgc = on_command(
     priority=2,
     block=True,
 )
+srgr = on_command(
+    "srgr",
+    aliases={"抽卡排行", "查看抽卡排行", "星铁抽卡排行"},
+    priority=2,
+    block=True,
+)
 
 HELP_MESSAGE = """\
 请在命令后跟上抽卡记录链接，获取链接的教程:
 docs.qq.com/doc/p/9c830f3e9398aaaf68d1eba225eead983947d2db"""
 
+RANK_POOLS = {"角色": "11", "光锥": "12", "常驻": "1", "新手": "2"}
+
 
 @srgu.handle()
 async def _(bot: Bot, event: Event, arg: Message = CommandArg()):
@@ -97,3 +107,23 @@ async def _(bot: Bot, event: Event):
         await msg_builder.finish(at_sender=not event.is_tome())
     msg_builder = MessageFactory([Image(img)])
     await msg_builder.finish()
+
+
+@srgr.handle()
+async def _(event: Event, arg: Message = CommandArg()):
+    pool = arg.extract_plain_text().strip().removesuffix("池").removesuffix("卡")
+    gacha_type = RANK_POOLS.get(pool or "角色")
+    if gacha_type is None:
+        msg_builder = MessageFactory([Text("请在命令后跟上卡池：角色/光锥/常驻/新手")])
+        await msg_builder.finish(at_sender=not event.is_tome())
+    try:
+        img = await get_srgacha_rank(gacha_type)
+    except Exception as e:
+        img = None
+        logger.warning(f"绘图出错：{e}")
+        logger.exception(e)
+    if img is None:
+        msg_builder = MessageFactory([Text("暂无抽卡统计数据")])
+        await msg_builder.finish(at_sender=not event.is_tome())
+    msg_builder = MessageFactory([Image(img)])
+    await msg_builder.finish()
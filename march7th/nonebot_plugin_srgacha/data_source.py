@@ -1,48 +1,35 @@
 import json
 import asyncio
 from io import BytesIO
+from pathlib import Path
+from typing import TypeVar, Optional
 from collections.abc import Generator
-from typing import Any, TypeVar, Optional
 from urllib.parse import parse_qs, urlparse, urlencode
 
 from yarl import URL
 from PIL import Image
 from nonebot import get_driver
+from nonebot.log import logger
 from pil_utils import BuildImage
-from pydantic import ValidationError
-from sqlalchemy import select, update
 from nonebot_plugin_orm import get_session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import BigInteger, cast, func, select
 from nonebot.drivers import Request, HTTPClientMixin
 from nonebot.compat import model_dump, type_validate_python
 
 try:
-    from march7th.nonebot_plugin_srres import srres
+    from march7th.nonebot_plugin_srres import srres, draw_text
 except ModuleNotFoundError:
-    from nonebot_plugin_srres import srres  # type: ignore
+    from nonebot_plugin_srres import srres, draw_text  # type: ignore
 
-from .model import GachaLog, GachaLogItem, UserGachaLog, GachaLogResponse
+from .stats import PoolStats
+from .limiter import AdaptiveRateLimiter
+from .rollup import Leaderboard, update_rollup, get_leaderboard
+from .model import GACHA_TYPES, GachaLog, GachaItem, GachaLogItem, GachaLogResponse
 
 fontname = srres.get_font()
 folder = srres.get_data_folder()
 
-# Resident characters and light cones
-RESIDENT = {
-    "1003",
-    "1004",
-    "1101",
-    "1104",
-    "1107",
-    "1209",
-    "1211",
-    "23000",
-    "23002",
-    "23003",
-    "23004",
-    "23005",
-    "23012",
-    "23013",
-}
-
 driver = get_driver()
 if not isinstance(driver, HTTPClientMixin):
     raise RuntimeError(
@@ -51,16 +38,35 @@ if not isinstance(driver, HTTPClientMixin):
 
 T = TypeVar("T")
 
+POOL_NAMES = {"1": "常驻卡池", "2": "新手卡池", "11": "角色卡池", "12": "光锥卡池"}
+
+RETCODE_TOO_FREQUENT = -110
+MAX_RETRIES = 5
+
 
 def wrap_list(lst: list[T], n: int) -> Generator[list[T], None, None]:
     for i in range(0, len(lst), n):
         yield lst[i : i + n]
 
 
-async def get_icon(id: str) -> Optional[Image.Image]:
-    icon = await srres.get_icon(id=id)
+async def get_icons(ids: set[str]) -> dict[str, Path]:
+    """
+    并发下载图标，返回 id 到图标路径的映射
+    """
+    id_list = list(ids)
+    paths = await asyncio.gather(*(srres.get_icon(id=id) for id in id_list))
+    return {id: path for id, path in zip(id_list, paths) if path}
+
+
+def get_icon(
+    icons: dict[str, Path],
+    id: str,
+    size: Optional[tuple[int, int]] = None,
+    circle: bool = False,
+) -> Optional[Image.Image]:
+    icon = icons.get(id)
     if icon:
-        return Image.open(icon).convert("RGBA")
+        return srres.load_image(icon, size=size, circle=circle)
     return None
 
 
@@ -71,7 +77,12 @@ async def request(url: str) -> Optional[dict]:
         URL(url, encoded=True),
         timeout=10,
     )
-    response = await driver.request(request)  # type: ignore
+    try:
+        response = await driver.request(request)  # type: ignore
+    except Exception as e:
+        # Transport errors and timeouts are retried by the caller
+        logger.warning(f"Request gacha log failed: {e!r}")
+        return None
     try:
         data = json.loads(response.content or "{}")
         return data
@@ -79,7 +90,20 @@ async def request(url: str) -> Optional[dict]:
         return None
 
 
-async def fetch_gacha_log(gacha_url: str, gacha_type: str) -> dict[str, GachaLogItem]:
+async def fetch_gacha_log(
+    gacha_url: str,
+    gacha_type: str,
+    limiter: Optional[AdaptiveRateLimiter] = None,
+    end_id: Optional[str] = None,
+) -> dict[str, GachaLogItem]:
+    """
+    Fetch gacha log of one pool page by page, newest first
+
+    Stop at the first page reaching `end_id`, the newest stored id, and
+    only return records newer than it
+    """
+    if limiter is None:
+        limiter = AdaptiveRateLimiter()
     parsed_url = urlparse(gacha_url)
     query_params = parse_qs(parsed_url.query)
     query_params["authkey_ver"] = ["1"]
@@ -91,49 +115,127 @@ async def fetch_gacha_log(gacha_url: str, gacha_type: str) -> dict[str, GachaLog
     url_base = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
     query_string = urlencode(query_params, doseq=True)
     full_gacha_log: dict[str, GachaLogItem] = {}
+    retries = 0
     while True:
         query_string = urlencode(query_params, doseq=True)
         url = f"{url_base}?{query_string}"
+        await limiter.acquire()
         response = await request(url)
+        if response is None or response.get("retcode") == RETCODE_TOO_FREQUENT:
+            # Back off and retry the same page
+            limiter.throttle()
+            retries += 1
+            if retries > MAX_RETRIES:
+                raise RuntimeError(f"Fetch gacha log of type {gacha_type} failed")
+            continue
+        retries = 0
         data = type_validate_python(GachaLogResponse, response)
+        limiter.success()
         if len(data.data.list_) == 0:
             break
-        gacha_log = {i.id: i for i in data.data.list_}
+        gacha_log = {
+            i.id: i
+            for i in data.data.list_
+            if end_id is None or int(i.id) > int(end_id)
+        }
         full_gacha_log.update(gacha_log)
+        if len(gacha_log) < len(data.data.list_):
+            break
         query_params["end_id"] = [data.data.list_[-1].id]
-        await asyncio.sleep(0.3)
     return full_gacha_log
 
 
-async def get_gacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[UserGachaLog]:
+async def query_gacha(
+    session: AsyncSession, bot_id: str, user_id: str, sr_uid: str
+) -> Optional[GachaLog]:
+    """
+    Get gacha from database in `session`
+    """
+    statement = (
+        select(GachaItem)
+        .where(
+            GachaItem.bot_id == bot_id,
+            GachaItem.user_id == user_id,
+            GachaItem.sr_uid == sr_uid,
+        )
+        .order_by(GachaItem.gacha_type, GachaItem.id)
+    )
+    records = (await session.scalars(statement)).all()
+    if not records:
+        return None
+    pools: dict[str, dict[str, GachaLogItem]] = {i: {} for i in GACHA_TYPES.values()}
+    for record in records:
+        pools.setdefault(record.gacha_type, {})[record.id] = GachaLogItem(
+            id=record.id,
+            gacha_id=record.gacha_id,
+            gacha_type=record.gacha_type,
+            item_type=record.item_type,
+            item_id=record.item_id,
+            rank_type=record.rank_type,
+            name=record.name,
+            count=record.count,
+            time=record.time,
+        )
+    return GachaLog(**{name: pools[i] for name, i in GACHA_TYPES.items()})
+
+
+async def get_gacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[GachaLog]:
     """
     Get gacha from database
     """
-    statement = select(UserGachaLog).where(
-        UserGachaLog.bot_id == bot_id,
-        UserGachaLog.user_id == user_id,
-        UserGachaLog.sr_uid == sr_uid,
+    async with get_session() as session:
+        return await query_gacha(session, bot_id, user_id, sr_uid)
+
+
+async def get_gacha_summary(
+    bot_id: str, user_id: str, sr_uid: str
+) -> dict[str, tuple[int, str]]:
+    """
+    Get record count and newest id of each pool
+    """
+    statement = (
+        select(
+            GachaItem.gacha_type,
+            func.count(),
+            # Compare ids as numbers, as fetch_gacha_log does
+            func.max(cast(GachaItem.id, BigInteger)),
+        )
+        .where(
+            GachaItem.bot_id == bot_id,
+            GachaItem.user_id == user_id,
+            GachaItem.sr_uid == sr_uid,
+        )
+        .group_by(GachaItem.gacha_type)
     )
     async with get_session() as session:
-        record = (await session.scalars(statement)).one_or_none()
-    return record
+        rows = (await session.execute(statement)).all()
+    return {gacha_type: (count, str(newest)) for gacha_type, count, newest in rows}
 
 
-async def save_gacha(gacha: UserGachaLog):
+async def save_gacha(bot_id: str, user_id: str, sr_uid: str, gacha: GachaLog):
     """
-    Save gacha to database
+    Append new gacha records to database and update rollups
+
+    Records and rollups are committed in one transaction, a failed rollup
+    leaves no records behind so the next import fetches them again
     """
-    select_gacha = await get_gacha(gacha.bot_id, gacha.user_id, gacha.sr_uid)
     async with get_session() as session:
-        if select_gacha:
-            statement = (
-                update(UserGachaLog)
-                .where(UserGachaLog.id == select_gacha.id)
-                .values(gacha=gacha.gacha)
+        for name, gacha_type in GACHA_TYPES.items():
+            session.add_all(
+                GachaItem(
+                    bot_id=bot_id,
+                    user_id=user_id,
+                    sr_uid=sr_uid,
+                    gacha_type=gacha_type,
+                    **model_dump(item, exclude={"gacha_type"}),
+                )
+                for item in getattr(gacha, name).values()
             )
-            await session.execute(statement)
-        else:
-            session.add(gacha)
+        await session.flush()
+        # Rollups are computed from all records of the user
+        all_gacha = await query_gacha(session, bot_id, user_id, sr_uid)
+        if all_gacha:
+            await update_rollup(session, bot_id, user_id, sr_uid, all_gacha, gacha)
         await session.commit()
 
 
@@ -141,35 +243,28 @@ async def update_srgacha(bot_id: str, user_id: str, sr_uid: str, url: str) -> st
     """
     Update user gacha log by url
     """
-    # Get orgin data
-    user_gacha = await get_gacha(bot_id, user_id, sr_uid)
-    if user_gacha:
-        try:
-            origin_data = type_validate_python(GachaLog, user_gacha.gacha)
-        except ValidationError:
-            origin_data = GachaLog()
-    else:
-        origin_data = GachaLog()
-    # Fetch new data
-    new_data = GachaLog()
-    new_data.common = await fetch_gacha_log(url, "1")
-    new_data.beginner = await fetch_gacha_log(url, "2")
-    new_data.character_event = await fetch_gacha_log(url, "11")
-    new_data.light_cone_event = await fetch_gacha_log(url, "12")
-    # Merge data
-    new_data.common.update(origin_data.common)
-    new_data.beginner.update(origin_data.beginner)
-    new_data.character_event.update(origin_data.character_event)
-    new_data.light_cone_event.update(origin_data.light_cone_event)
+    # Get count and newest id of stored data
+    summary = await get_gacha_summary(bot_id, user_id, sr_uid)
+    end_ids = {i: summary[i][1] if i in summary else None for i in GACHA_TYPES.values()}
+    # Fetch new data of all pools concurrently
+    limiter = AdaptiveRateLimiter()
+    tasks = [
+        asyncio.ensure_future(fetch_gacha_log(url, i, limiter, end_ids[i]))
+        for i in GACHA_TYPES.values()
+    ]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # Stop fetching other pools once one of them fails
+        for task in tasks:
+            task.cancel()
+        raise
+    new_data = GachaLog(**dict(zip(GACHA_TYPES, results)))
     # Calculate changes
-    common_add = len(new_data.common.keys()) - len(origin_data.common.keys())
-    beginner_add = len(new_data.beginner.keys()) - len(origin_data.beginner.keys())
-    character_event_add = len(new_data.character_event.keys()) - len(
-        origin_data.character_event.keys()
-    )
-    light_cone_event_add = len(new_data.light_cone_event.keys()) - len(
-        origin_data.light_cone_event.keys()
-    )
+    common_add = len(new_data.common)
+    beginner_add = len(new_data.beginner)
+    character_event_add = len(new_data.character_event)
+    light_cone_event_add = len(new_data.light_cone_event)
     # Save and return message
     if (
         common_add == 0
@@ -180,10 +275,7 @@ async def update_srgacha(bot_id: str, user_id: str, sr_uid: str, url: str) -> st
         ret_msg = "没有新的抽卡记录"
     else:
         # Save data
-        new_user_gacha = UserGachaLog(
-            bot_id=bot_id, user_id=user_id, sr_uid=sr_uid, gacha=new_data.dict()
-        )
-        await save_gacha(new_user_gacha)
+        await save_gacha(bot_id, user_id, sr_uid, new_data)
         ret_msg = "抽卡记录已更新，增加了"
         ret_msg += f" {common_add} 条常驻池记录，" if common_add else ""
         ret_msg += f" {beginner_add} 条新手池记录，" if beginner_add else ""
@@ -194,88 +286,129 @@ async def update_srgacha(bot_id: str, user_id: str, sr_uid: str, url: str) -> st
             f" {light_cone_event_add} 条光锥池记录，" if light_cone_event_add else ""
         )
         ret_msg = ret_msg.rstrip("，")
+    count = {i: summary[i][0] if i in summary else 0 for i in GACHA_TYPES.values()}
     ret_msg += "\n"
     ret_msg += "当前共有"
-    ret_msg += f" {len(new_data.common.keys())} 条常驻池记录，"
-    ret_msg += f" {len(new_data.beginner.keys())} 条新手池记录，"
-    ret_msg += f" {len(new_data.character_event.keys())} 条角色池记录，"
-    ret_msg += f" {len(new_data.light_cone_event.keys())} 条光锥池记录"
+    ret_msg += f" {count['1'] + common_add} 条常驻池记录，"
+    ret_msg += f" {count['2'] + beginner_add} 条新手池记录，"
+    ret_msg += f" {count['11'] + character_event_add} 条角色池记录，"
+    ret_msg += f" {count['12'] + light_cone_event_add} 条光锥池记录"
     ret_msg += "\n"
     ret_msg += "可回复『查看抽卡记录』查看"
     return ret_msg
 
 
-def analyze_gacha(gacha: dict[str, GachaLogItem]) -> dict[str, Any]:
-    result = {}
-    gacha_list = list(gacha.values())
-    gacha_sorted = sorted(gacha_list, key=lambda x: x.id)
-    counter_5_up = 0
-    counter_5 = 0
-    counter_4 = 0
-    counter_5_up_list = []
-    counter_5_list = []
-    items = {}
-    for item in gacha_sorted:
-        if item.rank_type == "5":
-            items[item.id] = model_dump(item)
-            items[item.id]["cost"] = counter_5
-            items[item.id]["is_up"] = False if item.item_id in RESIDENT else True
-            if item.item_id in RESIDENT:
-                counter_5_up += 1
-            else:
-                counter_5_up_list.append(counter_5_up)
-                counter_5_up = 0
-            counter_4 += 1
-            counter_5_list.append(counter_5)
-            counter_5 = 0
-        elif item.rank_type == "4":
-            counter_5_up += 1
-            counter_5 += 1
-            counter_4 = 0
-        else:
-            counter_5_up += 1
-            counter_5 += 1
-            counter_4 += 1
-    result["items"] = dict(sorted(items.items(), reverse=True))
-    result["avg_5_up_cost"] = (
-        sum(counter_5_up_list) / len(counter_5_up_list) if counter_5_up_list else 0
-    )
-    result["avg_5_cost"] = (
-        sum(counter_5_list) / len(counter_5_list) if counter_5_list else 0
-    )
-    result["counter_5_up"] = counter_5_up
-    result["counter_5"] = counter_5
-    result["counter_4"] = counter_4
-    return result
-
-
 async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesIO]:
     """
     Get user gacha log image
     """
     # Get gacha data
-    user_gacha = await get_gacha(bot_id, user_id, sr_uid)
-    if user_gacha is None:
+    gacha = await get_gacha(bot_id, user_id, sr_uid)
+    if gacha is None:
         return None
-    # Parse to model
-    try:
-        gacha = type_validate_python(GachaLog, user_gacha.gacha)
-    except ValidationError:
-        return None
-    # Get star5 items
-    star5_c = [item for item in gacha.common.values() if item.rank_type == "5"]
-    star5_b = [item for item in gacha.beginner.values() if item.rank_type == "5"]
-    star5_ce = [
-        item for item in gacha.character_event.values() if item.rank_type == "5"
-    ]
-    star5_lce = [
-        item for item in gacha.light_cone_event.values() if item.rank_type == "5"
-    ]
-    # Get analyze result
-    common = analyze_gacha(gacha.common)
-    beginner = analyze_gacha(gacha.beginner)
-    character_event = analyze_gacha(gacha.character_event)
-    light_cone_event = analyze_gacha(gacha.light_cone_event)
+    # Download icons before rendering
+    ids = {
+        item.item_id
+        for pool in (
+            gacha.common,
+            gacha.beginner,
+            gacha.character_event,
+            gacha.light_cone_event,
+        )
+        for item in pool.values()
+        if item.rank_type == "5"
+    }
+    icons = await get_icons(ids)
+    return await srres.run_render(draw_srgacha, sr_uid, gacha, icons)
+
+
+def draw_srgacha_overall_template() -> BuildImage:
+    """
+    Draw static layer of overall section
+    """
+    image = BuildImage.new("RGBA", (1160, 320), "black")
+    draw_text(image, (60, 50), "抽卡记录", fontsize=72, fontname=fontname, fill="white")
+    image.draw_line((50, 150, 1110, 150), fill="gray", width=2)
+    for x_index, label in ((50, "总抽卡数"), (350, "总五星数")):
+        draw_text(
+            image,
+            (x_index, 240, x_index + 160, 270),
+            label,
+            max_fontsize=24,
+            fontname=fontname,
+            fill="white",
+        )
+    draw_text(
+        image,
+        (650, 240, 790, 270),
+        "平均五星抽数",
+        max_fontsize=24,
+        fontname=fontname,
+        fill="white",
+    )
+    image.draw_line((50, 300, 1110, 300), fill="gray", width=2)
+    return image
+
+
+def draw_srgacha_pool_template(name: str) -> BuildImage:
+    """
+    Draw static layer of pool title
+    """
+    image = BuildImage.new("RGBA", (1160, 80), "black")
+    draw_text(
+        image, (50, 0, 210, 80), name, max_fontsize=32, fontname=fontname, fill="white"
+    )
+    draw_text(
+        image,
+        (350, 50, 510, 80),
+        "抽卡数",
+        max_fontsize=30,
+        fontname=fontname,
+        fill="white",
+    )
+    draw_text(
+        image,
+        (650, 50, 790, 80),
+        "平均五星抽数",
+        max_fontsize=30,
+        fontname=fontname,
+        fill="white",
+    )
+    draw_text(
+        image,
+        (930, 50, 1090, 80),
+        "未出五星",
+        max_fontsize=30,
+        fontname=fontname,
+        fill="white",
+    )
+    return image
+
+
+def draw_srgacha_item_template() -> BuildImage:
+    """
+    Draw static layer of star5 item
+    """
+    image = BuildImage.new("RGBA", (160, 180), "black")
+    image.draw_rounded_rectangle((0, 0, 160, 160), radius=10, outline="gray", width=2)
+    return image
+
+
+def draw_srgacha(
+    sr_uid: str, gacha: GachaLog, icons: dict[str, Path]
+) -> Optional[BytesIO]:
+    """
+    Draw user gacha log image
+    """
+    # Get statistics
+    stats_c = PoolStats(gacha.common.values())
+    stats_b = PoolStats(gacha.beginner.values())
+    stats_ce = PoolStats(gacha.character_event.values())
+    stats_lce = PoolStats(gacha.light_cone_event.values())
+    common = stats_c.summary()
+    beginner = stats_b.summary()
+    character_event = stats_ce.summary()
+    light_cone_event = stats_lce.summary()
     count_5_total = (
         common["counter_5"]
         + beginner["counter_5"]
@@ -283,14 +416,14 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         + light_cone_event["counter_5"]
     )
     # Calculate numerical values
-    num_c = len(gacha.common)
-    num_b = len(gacha.beginner)
-    num_ce = len(gacha.character_event)
-    num_lce = len(gacha.light_cone_event)
-    num_star5_c = len(star5_c)
-    num_star5_b = len(star5_b)
-    num_star5_ce = len(star5_ce)
-    num_star5_lce = len(star5_lce)
+    num_c = common["total"]
+    num_b = beginner["total"]
+    num_ce = character_event["total"]
+    num_lce = light_cone_event["total"]
+    num_star5_c = common["star5"]
+    num_star5_b = beginner["star5"]
+    num_star5_ce = character_event["star5"]
+    num_star5_lce = light_cone_event["star5"]
     num_total = num_c + num_b + num_ce + num_lce
     num_star5_total = num_star5_c + num_star5_b + num_star5_ce + num_star5_lce
     avg_star5_cost = (
@@ -316,25 +449,19 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
     )
     # Draw image
     # Overall
-    image_overall = BuildImage.new("RGBA", (1160, 320), "black")
-    # Nickname
-    image_overall.draw_text(
-        (60, 50), "抽卡记录", fontsize=72, fontname=fontname, fill="white"
-    )
+    image_overall = srres.get_template("srgacha_overall", draw_srgacha_overall_template)
     # UID
-    image_overall.draw_text(
-        (800, 85), f"UID {sr_uid}", fontsize=36, fontname=fontname, fill="white"
-    )
-    image_overall.draw_line((50, 150, 1110, 150), fill="gray", width=2)
-    # 总抽卡数
-    image_overall.draw_text(
-        (50, 240, 210, 270),
-        "总抽卡数",
-        max_fontsize=24,
+    draw_text(
+        image_overall,
+        (800, 85),
+        f"UID {sr_uid}",
+        fontsize=36,
         fontname=fontname,
         fill="white",
     )
-    image_overall.draw_text(
+    # 总抽卡数
+    draw_text(
+        image_overall,
         (50, 180, 210, 230),
         str(num_total),
         max_fontsize=48,
@@ -342,14 +469,8 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         fill="white",
     )
     # 总五星数
-    image_overall.draw_text(
-        (350, 240, 510, 270),
-        "总五星数",
-        max_fontsize=24,
-        fontname=fontname,
-        fill="white",
-    )
-    image_overall.draw_text(
+    draw_text(
+        image_overall,
         (350, 180, 510, 230),
         str(num_star5_total),
         max_fontsize=48,
@@ -357,14 +478,8 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         fill="white",
     )
     # 平均五星抽数
-    image_overall.draw_text(
-        (650, 240, 790, 270),
-        "平均五星抽数",
-        max_fontsize=24,
-        fontname=fontname,
-        fill="white",
-    )
-    image_overall.draw_text(
+    draw_text(
+        image_overall,
         (650, 180, 790, 230),
         str(avg_star5_cost),
         max_fontsize=48,
@@ -383,175 +498,167 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
             )
         )
     )
-    image_overall.draw_text(
+    draw_text(
+        image_overall,
         (930, 180, 1090, 270),
         comment,
         max_fontsize=56,
         fontname=fontname,
         fill="white",
     )
-    image_overall.draw_line((50, 300, 1110, 300), fill="gray", width=2)
     # Character event lines
     lines_character_event = []
-    for six_avatars in wrap_list(list(character_event["items"].values()), 6):
+    for six_avatars in wrap_list(stats_ce.star5(), 6):
         line = BuildImage.new("RGBA", (1160, 240), "black")
         x_index = 50
         for avatar in six_avatars:
-            item_image = BuildImage.new("RGBA", (160, 180), "black")
-            char_icon = await get_icon(str(avatar["item_id"]))
+            item_image = srres.get_template("srgacha_item", draw_srgacha_item_template)
+            char_icon = get_icon(
+                icons, str(avatar["item_id"]), size=(100, 100), circle=True
+            )
             if char_icon:
-                char_icon = BuildImage(char_icon).resize((100, 100)).circle()
                 item_image.paste(char_icon, (30, 15), alpha=True)
-            item_image.draw_text(
+            draw_text(
+                item_image,
                 (120, 10, 150, 40),
                 str(avatar["cost"]),
                 fontsize=24,
                 fontname=fontname,
                 fill="white",
             )
-            item_image.draw_text(
+            draw_text(
+                item_image,
                 (10, 10, 40, 40),
                 "UP" if avatar["is_up"] else "",
                 fontsize=24,
                 fontname=fontname,
                 fill="white",
             )
-            item_image.draw_text(
+            draw_text(
+                item_image,
                 (30, 125, 130, 155),
                 str(avatar["name"]),
                 fontsize=22,
                 fontname=fontname,
                 fill="white",
             )
-            item_image.draw_rounded_rectangle(
-                (0, 0, 160, 160),
-                radius=10,
-                outline="gray",
-                width=2,
-            )
             line.paste(item_image, (x_index, 0))
             x_index += 180
         lines_character_event.append(line)
     # Light cone event lines
     lines_light_cone_event = []
-    for six_avatars in wrap_list(list(light_cone_event["items"].values()), 6):
+    for six_avatars in wrap_list(stats_lce.star5(), 6):
         line = BuildImage.new("RGBA", (1160, 240), "black")
         x_index = 50
         for avatar in six_avatars:
-            item_image = BuildImage.new("RGBA", (160, 180), "black")
-            char_icon = await get_icon(str(avatar["item_id"]))
+            item_image = srres.get_template("srgacha_item", draw_srgacha_item_template)
+            char_icon = get_icon(
+                icons, str(avatar["item_id"]), size=(100, 100), circle=True
+            )
             if char_icon:
-                char_icon = BuildImage(char_icon).resize((100, 100)).circle()
                 item_image.paste(char_icon, (30, 15), alpha=True)
-            item_image.draw_text(
+            draw_text(
+                item_image,
                 (120, 10, 150, 40),
                 str(avatar["cost"]),
                 fontsize=24,
                 fontname=fontname,
                 fill="white",
             )
-            item_image.draw_text(
+            draw_text(
+                item_image,
                 (10, 10, 40, 40),
                 "UP" if avatar["is_up"] else "",
                 fontsize=24,
                 fontname=fontname,
                 fill="white",
             )
-            item_image.draw_text(
+            draw_text(
+                item_image,
                 (30, 125, 130, 155),
                 str(avatar["name"]),
                 fontsize=22,
                 fontname=fontname,
                 fill="white",
             )
-            item_image.draw_rounded_rectangle(
-                (0, 0, 160, 160),
-                radius=10,
-                outline="gray",
-                width=2,
-            )
             line.paste(item_image, (x_index, 0))
             x_index += 180
         lines_light_cone_event.append(line)
     # Stellar warp lines
     lines_common = []
-    for six_avatars in wrap_list(list(common["items"].values()), 6):
+    for six_avatars in wrap_list(stats_c.star5(), 6):
         line = BuildImage.new("RGBA", (1160, 240), "black")
         x_index = 50
         for avatar in six_avatars:
-            item_image = BuildImage.new("RGBA", (160, 180), "black")
-            char_icon = await get_icon(str(avatar["item_id"]))
+            item_image = srres.get_template("srgacha_item", draw_srgacha_item_template)
+            char_icon = get_icon(
+                icons, str(avatar["item_id"]), size=(100, 100), circle=True
+            )
             if char_icon:
-                char_icon = BuildImage(char_icon).resize((100, 100)).circle()
                 item_image.paste(char_icon, (30, 15), alpha=True)
-            item_image.draw_text(
+            draw_text(
+                item_image,
                 (120, 10, 150, 40),
                 str(avatar["cost"]),
                 fontsize=24,
                 fontname=fontname,
                 fill="white",
             )
-            # item_image.draw_text(
+            # draw_text(
+            #     item_image,
             #     (10, 10, 40, 40),
             #     "UP" if avatar["is_up"] else "",
             #     fontsize=24,
             #     fontname=fontname,
             #     fill="white",
             # )
-            item_image.draw_text(
+            draw_text(
+                item_image,
                 (30, 125, 130, 155),
                 str(avatar["name"]),
                 fontsize=22,
                 fontname=fontname,
                 fill="white",
             )
-            item_image.draw_rounded_rectangle(
-                (0, 0, 160, 160),
-                radius=10,
-                outline="gray",
-                width=2,
-            )
             line.paste(item_image, (x_index, 0))
             x_index += 180
         lines_common.append(line)
     # Departure warp lines
     lines_beginner = []
-    for six_avatars in wrap_list(list(beginner["items"].values()), 6):
+    for six_avatars in wrap_list(stats_b.star5(), 6):
         line = BuildImage.new("RGBA", (1160, 240), "black")
         x_index = 50
         for avatar in six_avatars:
-            item_image = BuildImage.new("RGBA", (160, 180), "black")
-            char_icon = await get_icon(str(avatar["item_id"]))
+            item_image = srres.get_template("srgacha_item", draw_srgacha_item_template)
+            char_icon = get_icon(
+                icons, str(avatar["item_id"]), size=(100, 100), circle=True
+            )
             if char_icon:
-                char_icon = BuildImage(char_icon).resize((100, 100)).circle()
                 item_image.paste(char_icon, (30, 15), alpha=True)
-            item_image.draw_text(
+            draw_text(
+                item_image,
                 (120, 10, 150, 40),
                 str(avatar["cost"]),
                 fontsize=24,
                 fontname=fontname,
                 fill="white",
             )
-            # item_image.draw_text(
+            # draw_text(
+            #     item_image,
             #     (10, 10, 40, 40),
             #     "UP" if avatar["is_up"] else "",
             #     fontsize=24,
             #     fontname=fontname,
             #     fill="white",
             # )
-            item_image.draw_text(
+            draw_text(
+                item_image,
                 (30, 125, 130, 155),
                 str(avatar["name"]),
                 fontsize=22,
                 fontname=fontname,
                 fill="white",
             )
-            item_image.draw_rounded_rectangle(
-                (0, 0, 160, 160),
-                radius=10,
-                outline="gray",
-                width=2,
-            )
             line.paste(item_image, (x_index, 0))
             x_index += 180
         lines_beginner.append(line)
@@ -566,22 +673,13 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
     image_res.paste(image_overall, (0, 0))
     y_index = 320
     # 角色卡池
-    image_res.draw_text(
-        (50, y_index, 210, y_index + 80),
-        "角色卡池",
-        max_fontsize=32,
-        fontname=fontname,
-        fill="white",
+    image_res.paste(
+        srres.get_template("srgacha_pool", draw_srgacha_pool_template, "角色卡池"),
+        (0, y_index),
     )
     # 抽卡数
-    image_res.draw_text(
-        (350, y_index + 50, 510, y_index + 80),
-        "抽卡数",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (350, y_index, 510, y_index + 50),
         str(num_ce),
         max_fontsize=48,
@@ -589,14 +687,8 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         fill="white",
     )
     # 平均五星抽数
-    image_res.draw_text(
-        (650, y_index + 50, 790, y_index + 80),
-        "平均五星抽数",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (650, y_index, 790, y_index + 50),
         str(avg_star5_cost_ce),
         max_fontsize=48,
@@ -604,14 +696,8 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         fill="white",
     )
     # 未出五星
-    image_res.draw_text(
-        (930, y_index + 50, 1090, y_index + 80),
-        "未出五星",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (930, y_index, 1090, y_index + 50),
         str(character_event["counter_5"]),
         max_fontsize=48,
@@ -624,22 +710,13 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         y_index += 200
     image_res.draw_line((50, y_index - 20, 1110, y_index - 20), fill="gray", width=2)
     # 光锥卡池
-    image_res.draw_text(
-        (50, y_index, 210, y_index + 80),
-        "光锥卡池",
-        max_fontsize=32,
-        fontname=fontname,
-        fill="white",
+    image_res.paste(
+        srres.get_template("srgacha_pool", draw_srgacha_pool_template, "光锥卡池"),
+        (0, y_index),
     )
     # 抽卡数
-    image_res.draw_text(
-        (350, y_index + 50, 510, y_index + 80),
-        "抽卡数",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (350, y_index, 510, y_index + 50),
         str(num_lce),
         max_fontsize=48,
@@ -647,14 +724,8 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         fill="white",
     )
     # 平均五星抽数
-    image_res.draw_text(
-        (650, y_index + 50, 790, y_index + 80),
-        "平均五星抽数",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (650, y_index, 790, y_index + 50),
         str(avg_star5_cost_lce),
         max_fontsize=48,
@@ -662,14 +733,8 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         fill="white",
     )
     # 未出五星
-    image_res.draw_text(
-        (930, y_index + 50, 1090, y_index + 80),
-        "未出五星",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (930, y_index, 1090, y_index + 50),
         str(light_cone_event["counter_5"]),
         max_fontsize=48,
@@ -682,22 +747,13 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         y_index += 200
     image_res.draw_line((50, y_index - 20, 1110, y_index - 20), fill="gray", width=2)
     # 常驻卡池
-    image_res.draw_text(
-        (50, y_index, 210, y_index + 80),
-        "常驻卡池",
-        max_fontsize=32,
-        fontname=fontname,
-        fill="white",
+    image_res.paste(
+        srres.get_template("srgacha_pool", draw_srgacha_pool_template, "常驻卡池"),
+        (0, y_index),
     )
     # 抽卡数
-    image_res.draw_text(
-        (350, y_index + 50, 510, y_index + 80),
-        "抽卡数",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (350, y_index, 510, y_index + 50),
         str(num_c),
         max_fontsize=48,
@@ -705,14 +761,8 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         fill="white",
     )
     # 平均五星抽数
-    image_res.draw_text(
-        (650, y_index + 50, 790, y_index + 80),
-        "平均五星抽数",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (650, y_index, 790, y_index + 50),
         str(avg_star5_cost_c),
         max_fontsize=48,
@@ -720,14 +770,8 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         fill="white",
     )
     # 未出五星
-    image_res.draw_text(
-        (930, y_index + 50, 1090, y_index + 80),
-        "未出五星",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (930, y_index, 1090, y_index + 50),
         str(common["counter_5"]),
         max_fontsize=48,
@@ -740,22 +784,13 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         y_index += 200
     image_res.draw_line((50, y_index - 20, 1110, y_index - 20), fill="gray", width=2)
     # 新手卡池
-    image_res.draw_text(
-        (50, y_index, 210, y_index + 80),
-        "新手卡池",
-        max_fontsize=32,
-        fontname=fontname,
-        fill="white",
+    image_res.paste(
+        srres.get_template("srgacha_pool", draw_srgacha_pool_template, "新手卡池"),
+        (0, y_index),
     )
     # 抽卡数
-    image_res.draw_text(
-        (350, y_index + 50, 510, y_index + 80),
-        "抽卡数",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (350, y_index, 510, y_index + 50),
         str(num_b),
         max_fontsize=48,
@@ -763,14 +798,8 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         fill="white",
     )
     # 平均五星抽数
-    image_res.draw_text(
-        (650, y_index + 50, 790, y_index + 80),
-        "平均五星抽数",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (650, y_index, 790, y_index + 50),
         str(avg_star5_cost_b),
         max_fontsize=48,
@@ -778,14 +807,8 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
         fill="white",
     )
     # 未出五星
-    image_res.draw_text(
-        (930, y_index + 50, 1090, y_index + 80),
-        "未出五星",
-        max_fontsize=30,
-        fontname=fontname,
-        fill="white",
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (930, y_index, 1090, y_index + 50),
         str(beginner["counter_5"]),
         max_fontsize=48,
@@ -805,3 +828,189 @@ async def get_srgacha(bot_id: str, user_id: str, sr_uid: str) -> Optional[BytesI
     )
 
     return image_res.save_png()
+
+
+async def get_srgacha_rank(gacha_type: str) -> Optional[BytesIO]:
+    """
+    Get gacha leaderboard image of all users
+    """
+    leaderboard = await get_leaderboard(gacha_type)
+    if leaderboard["server"] is None:
+        return None
+    icons = await get_icons({item.item_id for item in leaderboard["items"]})
+    return await srres.run_render(draw_srgacha_rank, gacha_type, leaderboard, icons)
+
+
+def mask_uid(sr_uid: str) -> str:
+    if len(sr_uid) <= 5:
+        return sr_uid
+    return sr_uid[:3] + "*" * (len(sr_uid) - 5) + sr_uid[-2:]
+
+
+def draw_srgacha_rank_template(name: str) -> BuildImage:
+    """
+    Draw static layer of leaderboard header
+    """
+    image = BuildImage.new("RGBA", (1160, 320), "black")
+    draw_text(image, (60, 50), "抽卡排行", fontsize=72, fontname=fontname, fill="white")
+    draw_text(image, (800, 85), name, fontsize=36, fontname=fontname, fill="white")
+    image.draw_line((50, 150, 1110, 150), fill="gray", width=2)
+    for x_index, label in (
+        (50, "统计人数"),
+        (350, "总抽卡数"),
+        (650, "平均五星抽数"),
+        (930, "小保底不歪"),
+    ):
+        draw_text(
+            image,
+            (x_index, 240, x_index + 160, 270),
+            label,
+            max_fontsize=24,
+            fontname=fontname,
+            fill="white",
+        )
+    image.draw_line((50, 300, 1110, 300), fill="gray", width=2)
+    return image
+
+
+def draw_srgacha_rank(
+    gacha_type: str, leaderboard: Leaderboard, icons: dict[str, Path]
+) -> Optional[BytesIO]:
+    """
+    Draw gacha leaderboard image of all users
+    """
+    server = leaderboard["server"]
+    if server is None:
+        return None
+    users = leaderboard["users"]
+    items = leaderboard["items"]
+    # Calculate numerical values
+    avg_star5_cost = round(server.cost_5 / server.star5, 1) if server.star5 else 0
+    num_5050 = server.win_5050 + server.lose_5050
+    win_rate = (
+        f"{round(server.win_5050 / num_5050 * 100, 1)}%"
+        if gacha_type in ("11", "12") and num_5050
+        else "-"
+    )
+    lines_items = list(wrap_list(list(items), 6))
+    total_height = 360
+    if users:
+        total_height += 100 + 60 * len(users)
+    if lines_items:
+        total_height += 100 + 200 * len(lines_items)
+    image_res = BuildImage.new("RGBA", (1160, total_height), "black")
+    # Overall
+    image_res.paste(
+        srres.get_template(
+            "srgacha_rank", draw_srgacha_rank_template, POOL_NAMES[gacha_type]
+        ),
+        (0, 0),
+    )
+    for x_index, value in (
+        (50, server.users),
+        (350, server.total),
+        (650, avg_star5_cost),
+        (930, win_rate),
+    ):
+        draw_text(
+            image_res,
+            (x_index, 180, x_index + 160, 230),
+            str(value),
+            max_fontsize=48,
+            fontname=fontname,
+            fill="white",
+        )
+    y_index = 320
+    # Users with lowest average cost
+    if users:
+        draw_text(
+            image_res,
+            (50, y_index, 410, y_index + 80),
+            "欧皇榜",
+            max_fontsize=32,
+            halign="left",
+            fontname=fontname,
+            fill="white",
+        )
+        for x_index, width, label in (
+            (350, 160, "五星数"),
+            (650, 140, "平均五星抽数"),
+        ):
+            draw_text(
+                image_res,
+                (x_index, y_index + 50, x_index + width, y_index + 80),
+                label,
+                max_fontsize=30,
+                fontname=fontname,
+                fill="white",
+            )
+        y_index += 100
+        for index, user in enumerate(users, start=1):
+            for xy, value in (
+                ((50, y_index, 110, y_index + 50), index),
+                ((130, y_index, 330, y_index + 50), mask_uid(user.sr_uid)),
+                ((350, y_index, 510, y_index + 50), user.star5),
+                ((650, y_index, 790, y_index + 50), round(user.avg_5_cost, 1)),
+            ):
+                draw_text(
+                    image_res,
+                    xy,
+                    str(value),
+                    max_fontsize=36,
+                    fontname=fontname,
+                    fill="white",
+                )
+            y_index += 60
+        image_res.draw_line(
+            (50, y_index + 10, 1110, y_index + 10), fill="gray", width=2
+        )
+        y_index += 20
+    # Most pulled 5-star items
+    if lines_items:
+        draw_text(
+            image_res,
+            (50, y_index, 410, y_index + 80),
+            "五星出货",
+            max_fontsize=32,
+            halign="left",
+            fontname=fontname,
+            fill="white",
+        )
+        y_index += 100
+        for six_items in lines_items:
+            x_index = 50
+            for item in six_items:
+                item_image = srres.get_template(
+                    "srgacha_item", draw_srgacha_item_template
+                )
+                char_icon = get_icon(icons, item.item_id, size=(100, 100), circle=True)
+                if char_icon:
+                    item_image.paste(char_icon, (30, 15), alpha=True)
+                draw_text(
+                    item_image,
+                    (110, 10, 150, 40),
+                    str(item.count),
+                    max_fontsize=24,
+                    fontname=fontname,
+                    fill="white",
+                )
+                draw_text(
+                    item_image,
+                    (30, 125, 130, 155),
+                    item.name,
+                    fontsize=22,
+                    fontname=fontname,
+                    fill="white",
+                )
+                image_res.paste(item_image, (x_index, y_index), alpha=True)
+                x_index += 180
+            y_index += 200
+
+    image_res.draw_rectangle(
+        (10, 10, 1160 - 10, total_height - 10), outline="gray", width=6
+    )
+    image_res.draw_rectangle(
+        (20, 20, 1160 - 20, total_height - 20), outline="white", width=2
+    )
+
+    return image_res.save_png()
@@ -0,0 +1,42 @@
+import asyncio
+
+
+class AdaptiveRateLimiter:
+    """
+    Adaptive request interval shared by concurrent gacha log fetches
+
+    Requests are spaced by the current interval. The interval shrinks slowly
+    after successful responses and doubles when the server reports that
+    requests are too frequent.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.3,
+        min_interval: float = 0.1,
+        max_interval: float = 5.0,
+    ) -> None:
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Wait for the next request slot
+        """
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def success(self) -> None:
+        self.interval = max(self.min_interval, self.interval * 0.9)
+
+    def throttle(self) -> None:
+        self.interval = min(self.max_interval, self.interval * 2)
+        # Push back pending slots so the next request waits for the new interval
+        self._next = asyncio.get_running_loop().time() + self.interval
@@ -0,0 +1,207 @@
+"""add gacha rollup
+
+迁移 ID: 46064922dcf9
+父迁移: 11ae871871bf
+创建时间: 2026-10-18 16:11:41.235881
+
+"""
+
+from __future__ import annotations
+
+from typing import Any
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from nonebot import logger
+
+revision: str = "46064922dcf9"
+down_revision: str | Sequence[str] | None = "11ae871871bf"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Resident characters and light cones
+RESIDENT = {
+    "1003",
+    "1004",
+    "1101",
+    "1104",
+    "1107",
+    "1209",
+    "1211",
+    "23000",
+    "23002",
+    "23003",
+    "23004",
+    "23005",
+    "23012",
+    "23013",
+}
+STAT_FIELDS = ("total", "star5", "cost_5", "win_5050", "lose_5050")
+
+
+def _backfill(userstat: sa.Table, serverstat: sa.Table, itemstat: sa.Table) -> None:
+    gachaitem = sa.table(
+        "nonebot_plugin_srgacha_gachaitem",
+        *(
+            sa.column(i)
+            for i in (
+                "bot_id",
+                "user_id",
+                "sr_uid",
+                "gacha_type",
+                "id",
+                "item_id",
+                "rank_type",
+                "name",
+            )
+        ),
+    )
+    statement = sa.select(gachaitem).order_by(
+        gachaitem.c.bot_id,
+        gachaitem.c.user_id,
+        gachaitem.c.sr_uid,
+        gachaitem.c.gacha_type,
+        # Compare ids as numbers, as the runtime does
+        sa.cast(gachaitem.c.id, sa.BigInteger),
+    )
+    users: dict[tuple[str, ...], dict[str, Any]] = {}
+    items: dict[tuple[str, str], dict[str, Any]] = {}
+    for item in op.get_bind().execute(statement):
+        stat = users.setdefault(
+            (item.bot_id, item.user_id, item.sr_uid, item.gacha_type),
+            dict.fromkeys(STAT_FIELDS, 0) | {"since_5": 0, "last_up": True},
+        )
+        stat["total"] += 1
+        stat["since_5"] += 1
+        if item.rank_type != "5":
+            continue
+        is_up = item.item_id not in RESIDENT
+        stat["star5"] += 1
+        stat["cost_5"] += stat["since_5"]
+        stat["since_5"] = 0
+        if stat["last_up"]:
+            stat["win_5050" if is_up else "lose_5050"] += 1
+        stat["last_up"] = is_up
+        item_stat = items.setdefault(
+            (item.gacha_type, item.item_id),
+            {
+                "gacha_type": item.gacha_type,
+                "item_id": item.item_id,
+                "name": item.name,
+                "count": 0,
+            },
+        )
+        item_stat["count"] += 1
+    if not users:
+        return
+
+    servers: dict[str, dict[str, Any]] = {}
+    for (_, _, _, gacha_type), stat in users.items():
+        server = servers.setdefault(
+            gacha_type,
+            {"gacha_type": gacha_type, "users": 0} | dict.fromkeys(STAT_FIELDS, 0),
+        )
+        server["users"] += 1
+        for i in STAT_FIELDS:
+            server[i] += stat[i]
+    op.bulk_insert(
+        userstat,
+        [
+            {
+                "bot_id": bot_id,
+                "user_id": user_id,
+                "sr_uid": sr_uid,
+                "gacha_type": gacha_type,
+                "avg_5_cost": stat["cost_5"] / stat["star5"] if stat["star5"] else 0,
+                **{i: stat[i] for i in STAT_FIELDS},
+            }
+            for (bot_id, user_id, sr_uid, gacha_type), stat in users.items()
+        ],
+    )
+    op.bulk_insert(serverstat, list(servers.values()))
+    op.bulk_insert(itemstat, list(items.values()))
+    logger.info(f"Built gacha rollup of {len(users)} pools of nonebot_plugin_srgacha")
+
+
+def upgrade(name: str = "") -> None:
+    if name:
+        return
+    # ### commands auto generated by Alembic - please adjust! ###
+    itemstat = op.create_table(
+        "nonebot_plugin_srgacha_gachaitemstat",
+        sa.Column("gacha_type", sa.String(length=16), nullable=False),
+        sa.Column("item_id", sa.String(length=32), nullable=False),
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "gacha_type",
+            "item_id",
+            name=op.f("pk_nonebot_plugin_srgacha_gachaitemstat"),
+        ),
+        info={"bind_key": "nonebot_plugin_srgacha"},
+    )
+    serverstat = op.create_table(
+        "nonebot_plugin_srgacha_gachaserverstat",
+        sa.Column("gacha_type", sa.String(length=16), nullable=False),
+        sa.Column("users", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("star5", sa.Integer(), nullable=False),
+        sa.Column("cost_5", sa.Integer(), nullable=False),
+        sa.Column("win_5050", sa.Integer(), nullable=False),
+        sa.Column("lose_5050", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "gacha_type", name=op.f("pk_nonebot_plugin_srgacha_gachaserverstat")
+        ),
+        info={"bind_key": "nonebot_plugin_srgacha"},
+    )
+    userstat = op.create_table(
+        "nonebot_plugin_srgacha_gachauserstat",
+        sa.Column("bot_id", sa.String(length=64), nullable=False),
+        sa.Column("user_id", sa.String(length=64), nullable=False),
+        sa.Column("sr_uid", sa.String(length=64), nullable=False),
+        sa.Column("gacha_type", sa.String(length=16), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("star5", sa.Integer(), nullable=False),
+        sa.Column("cost_5", sa.Integer(), nullable=False),
+        sa.Column("avg_5_cost", sa.Float(), nullable=False),
+        sa.Column("win_5050", sa.Integer(), nullable=False),
+        sa.Column("lose_5050", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "bot_id",
+            "user_id",
+            "sr_uid",
+            "gacha_type",
+            name=op.f("pk_nonebot_plugin_srgacha_gachauserstat"),
+        ),
+        info={"bind_key": "nonebot_plugin_srgacha"},
+    )
+    with op.batch_alter_table(
+        "nonebot_plugin_srgacha_gachauserstat", schema=None
+    ) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_nonebot_plugin_srgacha_gachauserstat_avg_5_cost"),
+            ["avg_5_cost"],
+            unique=False,
+        )
+
+    # ### end Alembic commands ###
+
+    _backfill(userstat, serverstat, itemstat)
+
+
+def downgrade(name: str = "") -> None:
+    if name:
+        return
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table(
+        "nonebot_plugin_srgacha_gachauserstat", schema=None
+    ) as batch_op:
+        batch_op.drop_index(
+            batch_op.f("ix_nonebot_plugin_srgacha_gachauserstat_avg_5_cost")
+        )
+
+    op.drop_table("nonebot_plugin_srgacha_gachauserstat")
+    op.drop_table("nonebot_plugin_srgacha_gachaserverstat")
+    op.drop_table("nonebot_plugin_srgacha_gachaitemstat")
+    # ### end Alembic commands ###
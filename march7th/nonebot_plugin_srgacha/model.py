@@ -1,6 +1,4 @@
-from typing import Any
-
-from sqlalchemy import JSON, String
+from sqlalchemy import Float, String
 from nonebot_plugin_orm import Model
 from pydantic import Field, BaseModel
 from sqlalchemy.orm import Mapped, mapped_column
@@ -48,14 +46,86 @@ class GachaLog(BaseModel):
     """
 
 
-class UserGachaLog(Model):
+# Field of GachaLog to gacha_type
+GACHA_TYPES = {
+    "common": "1",
+    "beginner": "2",
+    "character_event": "11",
+    "light_cone_event": "12",
+}
+
+
+class GachaItem(Model):
+    """
+    One gacha record, indexed by user and pool
+    """
+
+    __table_args__ = {"extend_existing": True}
+
+    bot_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    sr_uid: Mapped[str] = mapped_column(String(64), primary_key=True)
+    gacha_type: Mapped[str] = mapped_column(String(16), primary_key=True)
+    """
+    Pool type, 1: Stellar Warp, 2: Departure Warp,
+    11: Character Event Warp, 12: Light Cone Event Warp
+    """
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    gacha_id: Mapped[str] = mapped_column(String(32))
+    item_type: Mapped[str] = mapped_column(String(32))
+    item_id: Mapped[str] = mapped_column(String(32))
+    rank_type: Mapped[str] = mapped_column(String(16))
+    name: Mapped[str] = mapped_column(String(64))
+    count: Mapped[str] = mapped_column(String(16))
+    time: Mapped[str] = mapped_column(String(32))
+
+
+class GachaUserStat(Model):
+    """
+    Rollup of one pool of one user
+    """
+
     __table_args__ = {"extend_existing": True}
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    bot_id: Mapped[str] = mapped_column(String(64))
-    user_id: Mapped[str] = mapped_column(String(64))
-    sr_uid: Mapped[str] = mapped_column(String(64))
-    gacha: Mapped[dict[str, Any]] = mapped_column(JSON)
+    bot_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    sr_uid: Mapped[str] = mapped_column(String(64), primary_key=True)
+    gacha_type: Mapped[str] = mapped_column(String(16), primary_key=True)
+    total: Mapped[int] = mapped_column(default=0)
+    star5: Mapped[int] = mapped_column(default=0)
+    cost_5: Mapped[int] = mapped_column(default=0)
     """
-    JSON of GachaLog
+    Pulls spent on 5-stars, excluding those after the last one
     """
+    avg_5_cost: Mapped[float] = mapped_column(Float, default=0, index=True)
+    win_5050: Mapped[int] = mapped_column(default=0)
+    lose_5050: Mapped[int] = mapped_column(default=0)
+
+
+class GachaServerStat(Model):
+    """
+    Rollup of one pool of all users
+    """
+
+    __table_args__ = {"extend_existing": True}
+
+    gacha_type: Mapped[str] = mapped_column(String(16), primary_key=True)
+    users: Mapped[int] = mapped_column(default=0)
+    total: Mapped[int] = mapped_column(default=0)
+    star5: Mapped[int] = mapped_column(default=0)
+    cost_5: Mapped[int] = mapped_column(default=0)
+    win_5050: Mapped[int] = mapped_column(default=0)
+    lose_5050: Mapped[int] = mapped_column(default=0)
+
+
+class GachaItemStat(Model):
+    """
+    Count of one 5-star item pulled by all users
+    """
+
+    __table_args__ = {"extend_existing": True}
+
+    gacha_type: Mapped[str] = mapped_column(String(16), primary_key=True)
+    item_id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    name: Mapped[str] = mapped_column(String(64))
+    count: Mapped[int] = mapped_column(default=0)
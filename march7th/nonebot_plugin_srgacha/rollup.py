@@ -0,0 +1,165 @@
+from collections import Counter
+from collections.abc import Sequence
+from typing import Union, Optional, TypedDict
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from nonebot_plugin_orm import get_session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .stats import PoolStats
+from .model import (
+    GACHA_TYPES,
+    GachaLog,
+    GachaItemStat,
+    GachaUserStat,
+    GachaServerStat,
+)
+
+STAT_FIELDS = ("total", "star5", "cost_5", "win_5050", "lose_5050")
+
+
+class Leaderboard(TypedDict):
+    server: Optional[GachaServerStat]
+    users: Sequence[GachaUserStat]
+    items: Sequence[GachaItemStat]
+
+
+def get_user_stat(stats: PoolStats) -> dict[str, int]:
+    """
+    Rollup fields of one pool of one user
+    """
+    summary = stats.summary()
+    return {
+        "total": summary["total"],
+        "star5": summary["star5"],
+        "cost_5": summary["total"] - summary["counter_5"],
+        "win_5050": summary["win_5050"],
+        "lose_5050": summary["lose_5050"],
+    }
+
+
+async def _increment(
+    session: AsyncSession,
+    model: type[Union[GachaServerStat, GachaItemStat]],
+    key: dict[str, str],
+    values: dict[str, int],
+    defaults: Optional[dict[str, str]] = None,
+) -> None:
+    """
+    Add `values` to the row of `key`, insert the row if it does not exist
+
+    Rows shared by all users may be inserted by concurrent imports, an
+    insert losing the race is retried as an update
+    """
+    statement = (
+        update(model)
+        .where(*(getattr(model, k) == v for k, v in key.items()))
+        .values(**{k: getattr(model, k) + v for k, v in values.items()})
+    )
+    if (await session.execute(statement)).rowcount:
+        return
+    try:
+        async with session.begin_nested():
+            session.add(model(**key, **values, **(defaults or {})))
+    except IntegrityError:
+        await session.execute(statement)
+
+
+async def update_rollup(
+    session: AsyncSession,
+    bot_id: str,
+    user_id: str,
+    sr_uid: str,
+    gacha: GachaLog,
+    new_data: GachaLog,
+) -> None:
+    """
+    Update rollups after new records of one user are added
+
+    Runs in the session saving the records and does not commit, so records
+    and rollups are committed together
+
+    Args:
+        gacha: all records of the user, including new ones
+        new_data: new records of this import
+    """
+    for name, gacha_type in GACHA_TYPES.items():
+        new = get_user_stat(PoolStats(getattr(gacha, name).values()))
+        if new["total"] == 0:
+            continue
+        # User rollup, keep the difference for server rollup
+        user_stat = await session.get(
+            GachaUserStat, (bot_id, user_id, sr_uid, gacha_type)
+        )
+        if user_stat is None:
+            user_stat = GachaUserStat(
+                bot_id=bot_id, user_id=user_id, sr_uid=sr_uid, gacha_type=gacha_type
+            )
+            session.add(user_stat)
+            old = dict.fromkeys(STAT_FIELDS, 0)
+            new_user = 1
+        else:
+            old = {i: getattr(user_stat, i) for i in STAT_FIELDS}
+            new_user = 0
+        for i in STAT_FIELDS:
+            setattr(user_stat, i, new[i])
+        user_stat.avg_5_cost = new["cost_5"] / new["star5"] if new["star5"] else 0
+        delta = {i: new[i] - old[i] for i in STAT_FIELDS}
+        # Server rollup
+        await _increment(
+            session,
+            GachaServerStat,
+            {"gacha_type": gacha_type},
+            {"users": new_user, **delta},
+        )
+        # Item rollup, records are append-only so new 5-stars are added
+        names: dict[str, str] = {}
+        counts: Counter[str] = Counter()
+        for item in getattr(new_data, name).values():
+            if item.rank_type == "5":
+                names[item.item_id] = item.name
+                counts[item.item_id] += 1
+        for item_id, count in counts.items():
+            await _increment(
+                session,
+                GachaItemStat,
+                {"gacha_type": gacha_type, "item_id": item_id},
+                {"count": count},
+                {"name": names[item_id]},
+            )
+
+
+async def get_leaderboard(
+    gacha_type: str, limit: int = 10, min_star5: int = 3
+) -> Leaderboard:
+    """
+    Read leaderboard of one pool from rollups
+
+    Args:
+        gacha_type: pool type
+        limit: number of users and items
+        min_star5: users with fewer 5-stars are not ranked
+    """
+    async with get_session() as session:
+        server = await session.get(GachaServerStat, gacha_type)
+        users = (
+            await session.scalars(
+                select(GachaUserStat)
+                .where(
+                    GachaUserStat.gacha_type == gacha_type,
+                    GachaUserStat.star5 >= min_star5,
+                )
+                .order_by(GachaUserStat.avg_5_cost)
+                .limit(limit)
+            )
+        ).all()
+        items = (
+            await session.scalars(
+                select(GachaItemStat)
+                .where(GachaItemStat.gacha_type == gacha_type)
+                .order_by(GachaItemStat.count.desc())
+                .limit(limit)
+            )
+        ).all()
+    return {"server": server, "users": users, "items": items}
@@ -0,0 +1,170 @@
+from datetime import datetime
+from collections.abc import Iterable
+from typing import Optional, TypedDict
+
+import numpy as np
+
+from .model import GachaLogItem
+
+# Resident characters and light cones
+RESIDENT = {
+    "1003",
+    "1004",
+    "1101",
+    "1104",
+    "1107",
+    "1209",
+    "1211",
+    "23000",
+    "23002",
+    "23003",
+    "23004",
+    "23005",
+    "23012",
+    "23013",
+}
+
+
+class Star5Item(TypedDict):
+    id: str
+    gacha_id: str
+    item_id: str
+    name: str
+    time: str
+    cost: int
+    """
+    Pulls since the previous 5-star, excluding this one
+    """
+    is_up: bool
+
+
+class PoolSummary(TypedDict):
+    total: int
+    star5: int
+    star4: int
+    avg_5_cost: float
+    avg_5_up_cost: float
+    counter_5: int
+    """
+    Pulls since the last 5-star
+    """
+    counter_5_up: int
+    """
+    Pulls since the last UP 5-star
+    """
+    counter_4: int
+    """
+    Pulls since the last 4-star
+    """
+    win_5050: int
+    lose_5050: int
+
+
+class PoolStats:
+    """
+    Columnar statistics of one pool
+
+    Records are sorted by id and stored as arrays. Pity counters, UP streaks
+    and the 50/50 result of every 5-star are computed once in `__init__`,
+    summaries of the whole pool, one banner or a time window are masks
+    over these arrays.
+    """
+
+    def __init__(self, items: Iterable[GachaLogItem]) -> None:
+        items = list(items)
+        ids = np.array([int(i.id) for i in items], dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        self.id = ids[order]
+        self.rank = np.array([int(i.rank_type) for i in items], dtype=np.int8)[order]
+        self.item_id = np.array([i.item_id for i in items], dtype=np.str_)[order]
+        self.name = np.array([i.name for i in items], dtype=np.str_)[order]
+        self.gacha_id = np.array([i.gacha_id for i in items], dtype=np.str_)[order]
+        self.time = np.array([i.time for i in items], dtype="datetime64[s]")[order]
+        self.is_5 = self.rank == 5
+        self.is_4 = self.rank == 4
+        self.is_up = self.is_5 & ~np.isin(self.item_id, list(RESIDENT))
+        # Positions of 5-stars and pulls since the previous one
+        self.pos_5 = np.flatnonzero(self.is_5)
+        self.cost_5 = np.diff(self.pos_5, prepend=-1) - 1
+        up_5 = self.is_up[self.pos_5]
+        pos_up = self.pos_5[up_5]
+        self.cost_up = np.diff(pos_up, prepend=-1) - 1
+        # A 5-star after an off-banner one is guaranteed UP
+        self.is_5050 = np.ones_like(up_5)
+        self.is_5050[1:] = up_5[:-1]
+        self.up_5 = up_5
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def summary(self, mask: Optional[np.ndarray] = None) -> PoolSummary:
+        """
+        Summary of the records selected by `mask`, all records if None
+
+        Costs of 5-stars are counted on the whole pool, as pity carries over
+        between banners
+        """
+        if mask is None:
+            mask = np.ones(len(self), dtype=bool)
+        mask_5 = mask[self.pos_5]
+        cost_5 = self.cost_5[mask_5]
+        cost_up = self.cost_up[mask[self.pos_5[self.up_5]]]
+        is_5050 = self.is_5050[mask_5]
+        up_5 = self.up_5[mask_5]
+        return {
+            "total": int(np.count_nonzero(mask)),
+            "star5": int(cost_5.size),
+            "star4": int(np.count_nonzero(self.is_4 & mask)),
+            "avg_5_cost": float(cost_5.mean()) if cost_5.size else 0,
+            "avg_5_up_cost": float(cost_up.mean()) if cost_up.size else 0,
+            "counter_5": self._pulls_since(mask, self.is_5),
+            "counter_5_up": self._pulls_since(mask, self.is_up),
+            "counter_4": self._pulls_since(mask, self.is_4),
+            "win_5050": int(np.count_nonzero(is_5050 & up_5)),
+            "lose_5050": int(np.count_nonzero(is_5050 & ~up_5)),
+        }
+
+    @staticmethod
+    def _pulls_since(mask: np.ndarray, hit: np.ndarray) -> int:
+        last = np.flatnonzero(mask & hit)
+        start = last[-1] + 1 if last.size else 0
+        return int(np.count_nonzero(mask[start:]))
+
+    def by_banner(self) -> dict[str, PoolSummary]:
+        """
+        Summary of each banner, keyed by gacha_id
+        """
+        return {
+            str(gacha_id): self.summary(self.gacha_id == gacha_id)
+            for gacha_id in np.unique(self.gacha_id)
+        }
+
+    def window(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> PoolSummary:
+        """
+        Summary of records pulled in [start, end)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.time >= np.datetime64(start, "s")
+        if end is not None:
+            mask &= self.time < np.datetime64(end, "s")
+        return self.summary(mask)
+
+    def star5(self) -> list[Star5Item]:
+        """
+        5-star records, newest first
+        """
+        return [
+            {
+                "id": str(self.id[pos]),
+                "gacha_id": str(self.gacha_id[pos]),
+                "item_id": str(self.item_id[pos]),
+                "name": str(self.name[pos]),
+                "time": str(self.time[pos]).replace("T", " "),
+                "cost": int(cost),
+                "is_up": bool(self.is_up[pos]),
+            }
+            for pos, cost in zip(self.pos_5[::-1], self.cost_5[::-1])
+        ]
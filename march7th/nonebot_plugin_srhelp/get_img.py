@@ -1,12 +1,12 @@
 from io import BytesIO
 from typing import Any, Optional
 
-from pil_utils import BuildImage, text2image
+from pil_utils import BuildImage
 
 try:
-    from march7th.nonebot_plugin_srres import srres
+    from march7th.nonebot_plugin_srres import srres, draw_text, text_image
 except ModuleNotFoundError:
-    from nonebot_plugin_srres import srres
+    from nonebot_plugin_srres import srres, draw_text, text_image
 
 BACKGROUND = (248, 248, 248)
 WHITE = (255, 255, 255)
@@ -30,7 +30,7 @@ async def get_srhelp_img(plugin_info: dict[str, dict[str, str]]) -> Optional[Byt
     for k, v in plugin_info.items():
         description = v.get("description", "")
         usage = v.get("srhelp", "暂无帮助信息")
-        item_text_image = text2image(
+        item_text_image = text_image(
             f"[size=30][b]{k}[/b][/size]\n[size=20][i]{description}[/i][/size]\n[size=10] [/size]\n{usage}",
             fontsize=24,
             bg_color=BACKGROUND,
@@ -54,12 +54,17 @@ async def get_srhelp_img(plugin_info: dict[str, dict[str, str]]) -> Optional[Byt
         for k in item_image_dict.keys():
             item_image_dict[k]["x"] = (30 + 530) - item_image_dict[k]["x"]
     image = BuildImage.new("RGBA", (1060, 180 + max(cols_height)), BACKGROUND)
-    image.draw_text((60, 30), title, fontsize=56, weight="bold", **font_args)
-    image.draw_text(
-        (700, image.height - 60), tip, fontsize=16, weight="bold", **font_args
+    draw_text(image, (60, 30), title, fontsize=56, weight="bold", **font_args)
+    draw_text(
+        image, (700, image.height - 60), tip, fontsize=16, weight="bold", **font_args
     )
-    image.draw_text(
-        (700, image.height - 30), git_repo, fontsize=20, weight="bold", **font_args
+    draw_text(
+        image,
+        (700, image.height - 30),
+        git_repo,
+        fontsize=20,
+        weight="bold",
+        **font_args,
     )
     for k, v in item_image_dict.items():
         image.paste(v["image"], (v["x"], v["y"]))
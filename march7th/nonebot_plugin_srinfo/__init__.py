@@ -69,27 +69,29 @@ async def _(bot: Bot, event: Event):
         msg = "未绑定cookie，请使用`星铁扫码绑定`或`srqr`命令扫码绑定，或使用`星铁ck`或`srck`命令绑定"
         msg_builder = MessageFactory([Text(str(msg))])
         await msg_builder.finish(at_sender=not event.is_tome())
-    mys_api = MysApi()
+    mys_api = MysApi(cookie, device_id, device_fp)
     if not device_id or not device_fp:
         device_id, device_fp = await mys_api.init_device()
     logger.info(f"正在查询SRUID『{sr_uid}』信息")
-    mys_api = MysApi(cookie, device_id, device_fp)
-    sr_basic_info = await mys_api.get_game_basic_info(role_uid=sr_uid, mys_id=mys_id)
-    if isinstance(sr_basic_info, int):
-        if sr_basic_info in error_code_msg:
-            msg = error_code_msg[sr_basic_info]
+    (basic_result, index_result), new_device = await mys_api.batch(
+        mys_api.get_game_basic_info(role_uid=sr_uid, mys_id=mys_id),
+        mys_api.call_mihoyo_api(api="sr_index", role_uid=sr_uid),
+    )
+    if basic_result.retcode is not None:
+        if basic_result.retcode in error_code_msg:
+            msg = error_code_msg[basic_result.retcode]
         else:
-            msg = f"查询失败，错误代码 {sr_basic_info}"
+            msg = f"查询失败，错误代码 {basic_result.retcode}"
         msg_builder = MessageFactory([Text(str(msg))])
         await msg_builder.finish(at_sender=not event.is_tome())
-    sr_index = await mys_api.call_mihoyo_api(api="sr_index", role_uid=sr_uid)
-    if isinstance(sr_index, int):
-        if sr_index in error_code_msg:
-            msg = error_code_msg[sr_index]
+    if index_result.retcode is not None:
+        if index_result.retcode in error_code_msg:
+            msg = error_code_msg[index_result.retcode]
         else:
-            msg = f"查询失败，请稍后重试（错误代码 {sr_index}）"
+            msg = f"查询失败，请稍后重试（错误代码 {index_result.retcode}）"
         msg_builder = MessageFactory([Text(str(msg))])
         await msg_builder.finish(at_sender=not event.is_tome())
+    sr_basic_info, sr_index = basic_result.data, index_result.data
     try:
         avatar_id = sr_index["avatar_list"][0]["id"] if sr_index else None
     except (KeyError, IndexError):
@@ -101,18 +103,19 @@ async def _(bot: Bot, event: Event):
         msg = "疑似cookie失效，请重新使用`srck [cookie]`绑定或`srqr`扫码绑定"
         msg_builder = MessageFactory([Text(str(msg))])
         await msg_builder.finish(at_sender=not event.is_tome())
-    sr_avatar_info = await mys_api.call_mihoyo_api(
-        api="sr_avatar_info", role_uid=sr_uid, avatar_id=avatar_id
+    (avatar_result,), avatar_device = await mys_api.batch(
+        mys_api.call_mihoyo_api(
+            api="sr_avatar_info", role_uid=sr_uid, avatar_id=avatar_id
+        )
     )
-    if isinstance(sr_avatar_info, int):
-        sr_avatar_info = None
+    new_device = avatar_device or new_device
+    sr_avatar_info = avatar_result.data
     if not sr_basic_info or not sr_index:
         msg = "查询失败，请稍后重试"
         msg_builder = MessageFactory([Text(str(msg))])
         await msg_builder.finish(at_sender=not event.is_tome())
-    if sr_avatar_info and (new_fp := sr_avatar_info.get("new_fp")):
-        new_id = sr_avatar_info.get("new_id") or device_id
-        await set_user_fp(bot.self_id, event.get_user_id(), sr_uid, new_id, new_fp)
+    if new_device:
+        await set_user_fp(bot.self_id, event.get_user_id(), sr_uid, *new_device)
     logger.info(f"正在绘制SRUID『{sr_uid}』信息图片")
     img = await get_srinfo_img(sr_uid, sr_basic_info, sr_index, sr_avatar_info)
     if img:
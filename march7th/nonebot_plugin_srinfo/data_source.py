@@ -1,4 +1,6 @@
+import asyncio
 from io import BytesIO
+from pathlib import Path
 from typing import TypeVar, Optional
 from collections.abc import Generator
 
@@ -6,9 +8,9 @@ from PIL import Image
 from pil_utils import BuildImage
 
 try:
-    from march7th.nonebot_plugin_srres import srres
+    from march7th.nonebot_plugin_srres import srres, draw_text
 except ModuleNotFoundError:
-    from nonebot_plugin_srres import srres
+    from nonebot_plugin_srres import srres, draw_text
 
 STAR5 = (194, 152, 99)
 STAR4 = (128, 85, 194)
@@ -27,22 +29,95 @@ def level_fmt(level: int) -> str:
     return f"Lv.0{level}" if level < 10 else f"Lv.{level}"
 
 
-async def get_icon(id: str) -> Optional[Image.Image]:
-    icon = await srres.get_icon(id=id)
-    if icon:
-        return Image.open(icon).convert("RGBA")
-    return None
+async def get_icons(
+    ids: set[str], elements: set[str]
+) -> tuple[dict[str, Path], dict[str, Path]]:
+    """
+    并发下载角色、光锥和属性图标，返回 id 到图标路径的映射
+    """
+    id_list = list(ids)
+    element_list = list(elements)
+    paths = await asyncio.gather(*(srres.get_icon(id=id) for id in id_list))
+    element_paths = await asyncio.gather(
+        *(srres.get_icon_element(name) for name in element_list)
+    )
+    return (
+        {id: path for id, path in zip(id_list, paths) if path},
+        {name: path for name, path in zip(element_list, element_paths) if path},
+    )
 
 
-async def get_element_icon(name: str) -> Optional[Image.Image]:
-    icon = await srres.get_icon_element(name)
+def get_icon(
+    icons: dict[str, Path],
+    id: str,
+    size: Optional[tuple[int, int]] = None,
+    circle: bool = False,
+) -> Optional[Image.Image]:
+    icon = icons.get(id)
     if icon:
-        return Image.open(icon).convert("RGBA")
+        return srres.load_image(icon, size=size, circle=circle)
     return None
 
 
 async def get_srinfo_img(
     sr_uid, sr_basic_info, sr_index, sr_avatar_info
+) -> Optional[BytesIO]:
+    ids = {str(avatar["id"]) for avatar in sr_index["avatar_list"]}
+    details = sr_avatar_info["avatar_list"] if sr_avatar_info else []
+    ids.update(str(detail["equip"]["id"]) for detail in details if detail["equip"])
+    elements = {avatar["element"] for avatar in sr_index["avatar_list"]}
+    icons, element_icons = await get_icons(ids, elements)
+    return await srres.run_render(
+        draw_srinfo_img,
+        sr_uid,
+        sr_basic_info,
+        sr_index,
+        sr_avatar_info,
+        icons,
+        element_icons,
+    )
+
+
+def draw_srinfo_header_template() -> BuildImage:
+    """
+    绘制头部的静态图层：分隔线和统计项名称
+    """
+    image_bg = BuildImage.new("RGBA", (1160, 380), "black")
+    image_bg.draw_line((50, 150, 1110, 150), fill="gray", width=2)
+    for xy, label in (
+        ((50, 240, 210, 270), "活跃天数"),
+        ((350, 240, 510, 270), "解锁角色"),
+        ((650, 240, 790, 270), "达成成就"),
+        ((930, 240, 1090, 270), "宝箱开启"),
+        ((50, 310, 210, 340), "忘却之庭"),
+    ):
+        draw_text(image_bg, xy, label, max_fontsize=24, fontname=fontname, fill="white")
+    image_bg.draw_line((50, 290, 1110, 290), fill="gray", width=2)
+    image_bg.draw_line((50, 360, 1110, 360), fill="gray", width=2)
+    return image_bg
+
+
+def draw_srinfo_item_template(rarity: int) -> BuildImage:
+    """
+    绘制角色卡片的静态图层：按稀有度着色的边框
+    """
+    item_image = BuildImage.new("RGBA", (160, 240), "black")
+    item_image.draw_rounded_rectangle(
+        (0, 0, 160, 240),
+        radius=10,
+        outline=STAR5 if rarity == 5 else STAR4,
+        width=3,
+    )
+    return item_image
+
+
+def draw_srinfo_img(
+    sr_uid,
+    sr_basic_info,
+    sr_index,
+    sr_avatar_info,
+    icons: dict[str, Path],
+    element_icons: dict[str, Path],
 ) -> Optional[BytesIO]:
     nickname = sr_basic_info["nickname"]  # 昵称
     level = sr_basic_info["level"]  # 等级
@@ -68,15 +143,21 @@ async def get_srinfo_img(
             equips[detail["id"]]["level"] = equip["level"]
 
     # 绘制图片
-    image_bg = BuildImage.new("RGBA", (1160, 380), "black")
+    image_bg = srres.get_template("srinfo_header", draw_srinfo_header_template)
 
-    image_bg.draw_text(
-        (60, 50), nickname, fontsize=72, fontname=fontname, fill="white"
+    draw_text(
+        image_bg, (60, 50), nickname, fontsize=72, fontname=fontname, fill="white"
     )  # Nickname
-    image_bg.draw_text(
-        (550, 85), f"UID {sr_uid}", fontsize=36, fontname=fontname, fill="white"
+    draw_text(
+        image_bg,
+        (550, 85),
+        f"UID {sr_uid}",
+        fontsize=36,
+        fontname=fontname,
+        fill="white",
     )  # UID
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (960, 50, 1060, 140),
         str(level),
         max_fontsize=72,
@@ -84,58 +165,32 @@ async def get_srinfo_img(
         fill="white",
     )  # 开拓等级
 
-    image_bg.draw_line((50, 150, 1110, 150), fill="gray", width=2)
-
-    image_bg.draw_text(
-        (50, 240, 210, 270),
-        "活跃天数",
-        max_fontsize=24,
-        fontname=fontname,
-        fill="white",
-    )  # 活跃天数
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (50, 180, 210, 230),
         str(active_days),
         max_fontsize=48,
         fontname=fontname,
         fill="white",
     )  # 活跃天数
-    image_bg.draw_text(
-        (350, 240, 510, 270),
-        "解锁角色",
-        max_fontsize=24,
-        fontname=fontname,
-        fill="white",
-    )  # 解锁角色
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (350, 180, 510, 230),
         str(avater_num),
         max_fontsize=48,
         fontname=fontname,
         fill="white",
     )  # 解锁角色
-    image_bg.draw_text(
-        (650, 240, 790, 270),
-        "达成成就",
-        max_fontsize=24,
-        fontname=fontname,
-        fill="white",
-    )  # 达成成就
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (650, 180, 790, 230),
         str(achievement_num),
         max_fontsize=48,
         fontname=fontname,
         fill="white",
     )  # 达成成就
-    image_bg.draw_text(
-        (930, 240, 1090, 270),
-        "宝箱开启",
-        max_fontsize=24,
-        fontname=fontname,
-        fill="white",
-    )  # 宝箱开启
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (930, 180, 1090, 230),
         str(chest_num),
         max_fontsize=48,
@@ -143,16 +198,8 @@ async def get_srinfo_img(
         fill="white",
     )  # 宝箱开启
 
-    image_bg.draw_line((50, 290, 1110, 290), fill="gray", width=2)
-
-    image_bg.draw_text(
-        (50, 310, 210, 340),
-        "忘却之庭",
-        max_fontsize=24,
-        fontname=fontname,
-        fill="white",
-    )  # 忘却之庭
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (300, 310, 1060, 340),
         str(abyss_process),
         max_fontsize=36,
@@ -160,29 +207,24 @@ async def get_srinfo_img(
         fill="white",
     )  # 忘却之庭
 
-    image_bg.draw_line((50, 360, 1110, 360), fill="gray", width=2)
-
     # 角色部分 每 6 个一组
     lines = []
     for six_avatars in wrap_list(avatars, 6):
         line = BuildImage.new("RGBA", (1160, 240), "black")
         x_index = 50
         for avatar in six_avatars:
-            item_image = BuildImage.new("RGBA", (160, 240), "black")
             rank = avatar["rank"]
             rarity = avatar["rarity"]
-            char_icon = await get_icon(str(avatar["id"]))
-            element_icon = await get_element_icon(avatar["element"])
+            item_image = srres.get_template(
+                "srinfo_item", draw_srinfo_item_template, rarity
+            )
+            char_icon = get_icon(icons, str(avatar["id"]), size=(100, 100), circle=True)
+            element_icon = get_icon(element_icons, avatar["element"], size=(28, 28))
             if char_icon:
-                char_icon = (
-                    BuildImage(char_icon)
-                    .resize((100, 100))
-                    .circle()
-                    # .draw_arc((0, 0, 100, 100), 0, 360, width=2, fill="white")
-                )
                 # char_icon.draw_arc((0, 0, 100, 100), 0, 360, width=4, fill="white")
                 item_image.paste(char_icon, (30, 30), alpha=True)
-            item_image.draw_text(
+            draw_text(
+                item_image,
                 (30, 130, 130, 170),
                 level_fmt(avatar["level"]),
                 fontsize=36,
@@ -190,7 +232,6 @@ async def get_srinfo_img(
                 fill="white",
             )
             if element_icon:
-                element_icon = element_icon.resize((28, 28))
                 item_image.paste(element_icon, (116, 16), alpha=True)
             if rank > 0:
                 item_image.draw_rounded_rectangle(
@@ -199,7 +240,8 @@ async def get_srinfo_img(
                     radius=5,
                     width=2,
                 )
-                item_image.draw_text(
+                draw_text(
+                    item_image,
                     (21, 22, 40, 40),
                     str(rank),
                     max_fontsize=22,
@@ -208,21 +250,22 @@ async def get_srinfo_img(
                 )
             if avatar["id"] in equips:
                 equip = equips[avatar["id"]]
-                equip_icon = await get_icon(str(equip["id"]))
+                equip_icon = get_icon(icons, str(equip["id"]), size=(56, 56))
                 if equip_icon:
-                    equip_icon = equip_icon.resize((56, 56))
                     item_image.paste(equip_icon, (20, 170), alpha=True)
                     item_image.draw_rounded_rectangle(
                         (94, 174, 114, 194), outline="gray", radius=5, width=2
                     )
-                    item_image.draw_text(
+                    draw_text(
+                        item_image,
                         (95, 176, 114, 194),
                         str(equip["rank"]),
                         fontname=fontname,
                         max_fontsize=22,
                         fill="white",
                     )
-                    item_image.draw_text(
+                    draw_text(
+                        item_image,
                         (80, 198, 130, 226),
                         level_fmt(int(equip["level"])),
                         max_fontsize=24,
@@ -231,15 +274,13 @@ async def get_srinfo_img(
                     )
             else:
                 text = "未装备光锥" if sr_avatar_info else "未获取光锥信息"
-                item_image.draw_text(
-                    (20, 180, 140, 220), text, fontname=fontname, fill="white"
+                draw_text(
+                    item_image,
+                    (20, 180, 140, 220),
+                    text,
+                    fontname=fontname,
+                    fill="white",
                 )
-            item_image.draw_rounded_rectangle(
-                (0, 0, 160, 240),
-                radius=10,
-                outline=STAR5 if rarity == 5 else STAR4,
-                width=3,
-            )
             line.paste(item_image, (x_index, 0))
             x_index += 180
         lines.append(line)
@@ -91,29 +91,31 @@ async def _(bot: Bot, event: Event):
     mys_api = MysApi(cookie_with_token, device_id, device_fp)
     if not device_id or not device_fp:
         device_id, device_fp = await mys_api.init_device()
-    sr_basic_info = await mys_api.get_game_basic_info(role_uid=sr_uid, mys_id=mys_id)
-    sr_note = await mys_api.call_mihoyo_api(api="sr_widget", role_uid=sr_uid)
-    if isinstance(sr_basic_info, int):
-        if sr_basic_info in error_code_msg:
-            msg = error_code_msg[sr_basic_info]
+    (basic_result, note_result), new_device = await mys_api.batch(
+        mys_api.get_game_basic_info(role_uid=sr_uid, mys_id=mys_id),
+        mys_api.call_mihoyo_api(api="sr_widget", role_uid=sr_uid),
+    )
+    if basic_result.retcode is not None:
+        if basic_result.retcode in error_code_msg:
+            msg = error_code_msg[basic_result.retcode]
         else:
-            msg = f"查询失败，请稍后重试（错误代码 {sr_basic_info}）"
+            msg = f"查询失败，请稍后重试（错误代码 {basic_result.retcode}）"
         msg_builder = MessageFactory([Text(str(msg))])
         await msg_builder.finish(at_sender=not event.is_tome())
-    if isinstance(sr_note, int):
-        if sr_note in error_code_msg:
-            msg = error_code_msg[sr_note]
+    if note_result.retcode is not None:
+        if note_result.retcode in error_code_msg:
+            msg = error_code_msg[note_result.retcode]
         else:
-            msg = f"查询失败，请稍后重试（错误代码 {sr_note}）"
+            msg = f"查询失败，请稍后重试（错误代码 {note_result.retcode}）"
         msg_builder = MessageFactory([Text(str(msg))])
         await msg_builder.finish(at_sender=not event.is_tome())
+    sr_basic_info, sr_note = basic_result.data, note_result.data
     if not sr_basic_info or not sr_note:
         msg = "疑似cookie失效，请重新使用`srck [cookie]`绑定或`srqr`扫码绑定"
         msg_builder = MessageFactory([Text(str(msg))])
         await msg_builder.finish(at_sender=not event.is_tome())
-    if new_fp := sr_note.get("new_fp"):
-        new_id = sr_note.get("new_id") or device_id
-        await set_user_fp(bot.self_id, event.get_user_id(), sr_uid, new_id, new_fp)
+    if new_device:
+        await set_user_fp(bot.self_id, event.get_user_id(), sr_uid, *new_device)
     logger.info(f"正在绘制SRUID『{sr_uid}』便笺图片")
     img = await get_srmemo_img(sr_uid, sr_basic_info, sr_note)
     if img:
@@ -143,29 +145,31 @@ async def _(bot: Bot, event: Event):
     mys_api = MysApi(cookie, device_id, device_fp)
     if not device_id or not device_fp:
         device_id, device_fp = await mys_api.init_device()
-    sr_basic_info = await mys_api.get_game_basic_info(role_uid=sr_uid, mys_id=mys_id)
-    sr_month = await mys_api.call_mihoyo_api(api="sr_month_info", role_uid=sr_uid)
-    if isinstance(sr_basic_info, int):
-        if sr_basic_info in error_code_msg:
-            msg = error_code_msg[sr_basic_info]
+    (basic_result, month_result), new_device = await mys_api.batch(
+        mys_api.get_game_basic_info(role_uid=sr_uid, mys_id=mys_id),
+        mys_api.call_mihoyo_api(api="sr_month_info", role_uid=sr_uid),
+    )
+    if basic_result.retcode is not None:
+        if basic_result.retcode in error_code_msg:
+            msg = error_code_msg[basic_result.retcode]
         else:
-            msg = f"查询失败，请稍后重试（错误代码 {sr_basic_info}）"
+            msg = f"查询失败，请稍后重试（错误代码 {basic_result.retcode}）"
         msg_builder = MessageFactory([Text(str(msg))])
         await msg_builder.finish(at_sender=not event.is_tome())
-    if isinstance(sr_month, int):
-        if sr_month in error_code_msg:
-            msg = error_code_msg[sr_month]
+    if month_result.retcode is not None:
+        if month_result.retcode in error_code_msg:
+            msg = error_code_msg[month_result.retcode]
         else:
-            msg = f"查询失败，请稍后重试（错误代码 {sr_month}）"
+            msg = f"查询失败，请稍后重试（错误代码 {month_result.retcode}）"
         msg_builder = MessageFactory([Text(str(msg))])
         await msg_builder.finish(at_sender=not event.is_tome())
+    sr_basic_info, sr_month = basic_result.data, month_result.data
     if not sr_basic_info or not sr_month:
         msg = "疑似cookie失效，请重新使用`srck [cookie]`绑定或`srqr`扫码绑定"
         msg_builder = MessageFactory([Text(str(msg))])
         await msg_builder.finish(at_sender=not event.is_tome())
-    if new_fp := sr_month.get("new_fp"):
-        new_id = sr_month.get("new_id") or device_id
-        await set_user_fp(bot.self_id, event.get_user_id(), sr_uid, new_id, new_fp)
+    if new_device:
+        await set_user_fp(bot.self_id, event.get_user_id(), sr_uid, *new_device)
     logger.info(f"正在绘制SRUID『{sr_uid}』月历图片")
     img = await get_srmonth_img(sr_uid, sr_basic_info, sr_month)
     if img:
@@ -4,9 +4,9 @@ from typing import Optional
 from pil_utils import BuildImage
 
 try:
-    from march7th.nonebot_plugin_srres import srres
+    from march7th.nonebot_plugin_srres import srres, draw_text
 except ModuleNotFoundError:
-    from nonebot_plugin_srres import srres
+    from nonebot_plugin_srres import srres, draw_text
 
 fontname = srres.get_font()
 
@@ -25,6 +25,10 @@ def time_fmt(sec: int) -> str:
 
 
 async def get_srmemo_img(sr_uid, sr_basic_info, sr_note) -> Optional[BytesIO]:
+    return await srres.run_render(draw_srmemo_img, sr_uid, sr_basic_info, sr_note)
+
+
+def draw_srmemo_img(sr_uid, sr_basic_info, sr_note) -> Optional[BytesIO]:
     nickname = sr_basic_info["nickname"]  # 昵称
     level = sr_basic_info["level"]  # 等级
 
@@ -44,13 +48,19 @@ async def get_srmemo_img(sr_uid, sr_basic_info, sr_note) -> Optional[BytesIO]:
     # 绘制图片
     image_bg = BuildImage.new("RGBA", (800, 260), "black")
 
-    image_bg.draw_text(
-        (60, 50), nickname, fontsize=48, fontname=fontname, fill="white"
+    draw_text(
+        image_bg, (60, 50), nickname, fontsize=48, fontname=fontname, fill="white"
     )  # Nickname
-    image_bg.draw_text(
-        (60, 110), f"UID {sr_uid}", fontsize=24, fontname=fontname, fill="white"
+    draw_text(
+        image_bg,
+        (60, 110),
+        f"UID {sr_uid}",
+        fontsize=24,
+        fontname=fontname,
+        fill="white",
     )  # UID
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (600, 50, 700, 140),
         str(level),
         max_fontsize=72,
@@ -61,10 +71,16 @@ async def get_srmemo_img(sr_uid, sr_basic_info, sr_note) -> Optional[BytesIO]:
     image_bg.draw_line((50, 150, 750, 150), fill="gray", width=2)
 
     # 开拓力
-    image_bg.draw_text(
-        (50, 190, 180, 220), "开拓力", max_fontsize=24, fontname=fontname, fill="white"
+    draw_text(
+        image_bg,
+        (50, 190, 180, 220),
+        "开拓力",
+        max_fontsize=24,
+        fontname=fontname,
+        fill="white",
     )
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (200, 170, 480, 230),
         stamina_str,
         max_fontsize=54,
@@ -72,7 +88,8 @@ async def get_srmemo_img(sr_uid, sr_basic_info, sr_note) -> Optional[BytesIO]:
         fill="white",
     )
     if stamina == max_stamina:
-        image_bg.draw_text(
+        draw_text(
+            image_bg,
             (500, 190, 720, 220),
             "已回满",
             max_fontsize=24,
@@ -80,7 +97,8 @@ async def get_srmemo_img(sr_uid, sr_basic_info, sr_note) -> Optional[BytesIO]:
             fill="white",
         )
     else:
-        image_bg.draw_text(
+        draw_text(
+            image_bg,
             (500, 190, 720, 220),
             f"{stamina_recovery_time} 后回满",
             max_fontsize=24,
@@ -99,11 +117,17 @@ async def get_srmemo_img(sr_uid, sr_basic_info, sr_note) -> Optional[BytesIO]:
         line.draw_rounded_rectangle(
             (50, 0, 750, 60), radius=10, outline="gray", width=2
         )
-        line.draw_text(
-            (60, 0, 400, 60), name, max_fontsize=24, fontname=fontname, fill="white"
+        draw_text(
+            line,
+            (60, 0, 400, 60),
+            name,
+            max_fontsize=24,
+            fontname=fontname,
+            fill="white",
         )
         if int(expedition["remaining_time"]) == 0:
-            line.draw_text(
+            draw_text(
+                line,
                 (400, 0, 700, 60),
                 "已完成",
                 max_fontsize=24,
@@ -111,7 +135,8 @@ async def get_srmemo_img(sr_uid, sr_basic_info, sr_note) -> Optional[BytesIO]:
                 fill="white",
             )
         else:
-            line.draw_text(
+            draw_text(
+                line,
                 (400, 0, 700, 60),
                 f"剩余 {remaining_time}",
                 max_fontsize=24,
@@ -137,6 +162,10 @@ async def get_srmemo_img(sr_uid, sr_basic_info, sr_note) -> Optional[BytesIO]:
 
 
 async def get_srmonth_img(sr_uid, sr_basic_info, sr_month) -> Optional[BytesIO]:
+    return await srres.run_render(draw_srmonth_img, sr_uid, sr_basic_info, sr_month)
+
+
+def draw_srmonth_img(sr_uid, sr_basic_info, sr_month) -> Optional[BytesIO]:
     nickname = sr_basic_info["nickname"]  # 昵称
     level = sr_basic_info["level"]  # 等级
 
@@ -177,13 +206,19 @@ async def get_srmonth_img(sr_uid, sr_basic_info, sr_month) -> Optional[BytesIO]:
 
     # 绘制图片
     image_bg = BuildImage.new("RGBA", (800, 800), "black")
-    image_bg.draw_text(
-        (60, 50), nickname, fontsize=48, fontname=fontname, fill="white"
+    draw_text(
+        image_bg, (60, 50), nickname, fontsize=48, fontname=fontname, fill="white"
     )  # Nickname
-    image_bg.draw_text(
-        (60, 110), f"UID {sr_uid}", fontsize=24, fontname=fontname, fill="white"
+    draw_text(
+        image_bg,
+        (60, 110),
+        f"UID {sr_uid}",
+        fontsize=24,
+        fontname=fontname,
+        fill="white",
     )  # UID
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (600, 50, 700, 140),
         str(level),
         max_fontsize=72,
@@ -192,28 +227,32 @@ async def get_srmonth_img(sr_uid, sr_basic_info, sr_month) -> Optional[BytesIO]:
     )  # 开拓等级
     image_bg.draw_line((50, 150, 750, 150), fill="gray", width=2)
 
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (50, 190, 160, 220),
         "本日获取",
         max_fontsize=24,
         fontname=fontname,
         fill="white",
     )
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (50, 260, 160, 290),
         "昨日获取",
         max_fontsize=24,
         fontname=fontname,
         fill="white",
     )
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (50, 330, 160, 360),
         "本月获取",
         max_fontsize=24,
         fontname=fontname,
         fill="white",
     )
-    image_bg.draw_text(
+    draw_text(
+        image_bg,
         (50, 400, 160, 430),
         "上月获取",
         max_fontsize=24,
@@ -224,28 +263,32 @@ async def get_srmonth_img(sr_uid, sr_basic_info, sr_month) -> Optional[BytesIO]:
     y_index = 170
 
     for data in month_datas:
-        image_bg.draw_text(
+        draw_text(
+            image_bg,
             (200, y_index, 350, y_index + 60),
             str(data["hcoin"]),
             max_fontsize=48,
             fontname=fontname,
             fill="white",
         )
-        image_bg.draw_text(
+        draw_text(
+            image_bg,
             (350, y_index + 20, 450, y_index + 40),
             "星琼",
             max_fontsize=24,
             fontname=fontname,
             fill="white",
         )
-        image_bg.draw_text(
+        draw_text(
+            image_bg,
             (450, y_index, 550, y_index + 60),
             str(data["pass"]),
             max_fontsize=48,
             fontname=fontname,
             fill="white",
         )
-        image_bg.draw_text(
+        draw_text(
+            image_bg,
             (550, y_index + 20, 750, y_index + 40),
             "星轨通票&星轨专票",
             max_fontsize=24,
@@ -258,16 +301,26 @@ async def get_srmonth_img(sr_uid, sr_basic_info, sr_month) -> Optional[BytesIO]:
 
     y_index = 480
     for line in group_by.split("\n"):
-        image_bg.draw_text(
-            (60, y_index), line, fontsize=24, fontname=fontname, fill="white"
+        draw_text(
+            image_bg, (60, y_index), line, fontsize=24, fontname=fontname, fill="white"
         )
         y_index = y_index + 40
 
-    image_bg.draw_text(
-        (500, 520, 720, 620), "开 拓", max_fontsize=100, fontname=fontname, fill="white"
+    draw_text(
+        image_bg,
+        (500, 520, 720, 620),
+        "开 拓",
+        max_fontsize=100,
+        fontname=fontname,
+        fill="white",
     )
-    image_bg.draw_text(
-        (500, 620, 720, 720), "月 历", max_fontsize=100, fontname=fontname, fill="white"
+    draw_text(
+        image_bg,
+        (500, 620, 720, 720),
+        "月 历",
+        max_fontsize=100,
+        fontname=fontname,
+        fill="white",
     )
     image_bg.draw_rounded_rectangle(
         (480, 500, 740, 740), outline="gray", width=2, radius=20
@@ -0,0 +1,129 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import contextlib
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+from nonebot.log import logger
+from nonebot.compat import model_dump
+from nonebot_plugin_localstore import get_cache_dir
+
+try:
+    from march7th.nonebot_plugin_srres import srres
+except ModuleNotFoundError:
+    from nonebot_plugin_srres import srres
+
+from .config import plugin_config
+from .model import ScoreFile, PlayerInfo, CharacterInfo
+
+# 绘图代码有改动时修改此版本号，使旧的缓存失效
+PanelCacheVersion = 1
+
+
+def get_font_stamp() -> Optional[list[int]]:
+    """
+    字体文件的修改时间和大小，字体文件不存在时为 None
+    """
+    try:
+        stat = os.stat(srres.get_font())
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def get_panel_key(
+    player_info: PlayerInfo, character_info: CharacterInfo, score: ScoreFile
+) -> str:
+    """
+    计算面板图片的缓存键
+
+    由玩家信息、角色信息、角色评分配置、资源版本和字体共同决定
+    """
+    score_item = score.get(character_info.id)
+    data = {
+        "version": PanelCacheVersion,
+        "player": model_dump(player_info),
+        "character": model_dump(character_info),
+        "score": model_dump(score_item) if score_item else None,
+        "res": srres.get_version(),
+        "font": get_font_stamp(),
+    }
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, ensure_ascii=False).encode()
+    ).hexdigest()
+
+
+class PanelCache:
+    """
+    面板图片磁盘缓存
+
+    按缓存键保存绘制好的 PNG 文件，总大小超出上限时按最近使用时间淘汰。
+    """
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[BytesIO]:
+        if self.max_bytes <= 0:
+            return None
+        file = self.path / f"{key}.png"
+        try:
+            data = file.read_bytes()
+        except OSError:
+            return None
+        # 更新修改时间作为最近使用时间
+        with contextlib.suppress(OSError):
+            os.utime(file)
+        return BytesIO(data)
+
+    def put(self, key: str, image: BytesIO) -> None:
+        if self.max_bytes <= 0:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{key}.", dir=self.path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(image.getvalue())
+            os.replace(tmp, self.path / f"{key}.png")
+        except OSError as e:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            logger.warning(f"面板缓存写入失败: {e}")
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        删除最久未使用的缓存文件，直到总大小不超过上限
+        """
+        with self._lock:
+            files: list[tuple[float, int, Path]] = []
+            for file in self.path.glob("*.png"):
+                with contextlib.suppress(OSError):
+                    stat = file.stat()
+                    files.append((stat.st_mtime, stat.st_size, file))
+            total = sum(size for _, size, _ in files)
+            for _, size, file in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                with contextlib.suppress(OSError):
+                    file.unlink()
+                total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            for file in self.path.glob("*.png"):
+                with contextlib.suppress(OSError):
+                    file.unlink()
+
+
+panel_cache = PanelCache(
+    get_cache_dir("nonebot_plugin_srpanel") / "panel",
+    plugin_config.sr_panel_cache_size * 1024**2,
+)
@@ -10,6 +10,7 @@ class Config(BaseModel):
     sr_score_url: Optional[str] = (
         "https://raw.githubusercontent.com/Mar-7th/StarRailScore/master/score.json"
     )
+    sr_panel_cache_size: int = 64
 
 
 plugin_config = get_plugin_config(Config)
@@ -1,14 +1,16 @@
+import asyncio
 from io import BytesIO
 from typing import Optional
 
+from PIL import Image
 from pil_utils import BuildImage
-from PIL import Image, ImageEnhance
 
 try:
-    from march7th.nonebot_plugin_srres import srres
+    from march7th.nonebot_plugin_srres import srres, draw_text
 except ModuleNotFoundError:
-    from nonebot_plugin_srres import srres
+    from nonebot_plugin_srres import srres, draw_text
 
+from .cache import panel_cache, get_panel_key
 from .model import ScoreFile, PlayerInfo, CharacterInfo
 
 fontname = srres.get_font()
@@ -35,14 +37,119 @@ def get_relic_type(relic_id: str) -> str:
     return relic_type_dict[type_str]
 
 
-async def get_image(file: str) -> Optional[Image.Image]:
-    if file and await srres.cache(file):
-        return Image.open(folder / file).convert("RGBA")
+def get_image(
+    file: str,
+    size: Optional[tuple[int, int]] = None,
+    border: int = 0,
+    brightness: float = 1.0,
+) -> Optional[Image.Image]:
+    if file and (folder / file).exists():
+        return srres.load_image(
+            folder / file, size, border=border, brightness=brightness
+        )
     return None
 
 
+def get_panel_files(character_info: CharacterInfo) -> set[str]:
+    files = {"icon/logo/bg.png", "icon/logo/cn.png", character_info.preview}
+    files.update(character_info.rank_icons)
+    if character_info.path:
+        files.add(character_info.path.icon)
+    if character_info.element:
+        files.add(character_info.element.icon)
+    files.update(skill.icon for skill in character_info.skills)
+    files.update(skill_tree.icon for skill_tree in character_info.skill_trees)
+    if character_info.light_cone:
+        files.add(character_info.light_cone.icon)
+    files.update(prop.icon for prop in character_info.properties)
+    for relic in character_info.relics:
+        files.add(relic.icon)
+        files.update(affix.icon for affix in relic.sub_affix)
+    for relic_set in character_info.relic_sets:
+        files.add(relic_set.icon)
+        files.update(prop.icon for prop in relic_set.properties[:1])
+    files.discard("")
+    return files
+
+
 async def get_srpanel_img(
     player_info: PlayerInfo, character_info: CharacterInfo, score: ScoreFile
+) -> Optional[BytesIO]:
+    key = get_panel_key(player_info, character_info, score)
+    if img := panel_cache.get(key):
+        return img
+    files = get_panel_files(character_info)
+    results = await asyncio.gather(*(srres.cache(file) for file in files))
+    img = await srres.run_render(draw_srpanel_img, player_info, character_info, score)
+    # 有图标下载失败时不缓存，资源可用后重新绘制
+    if img is not None and all(results):
+        await asyncio.to_thread(panel_cache.put, key, img)
+    return img
+
+
+def draw_srpanel_template() -> BuildImage:
+    """
+    绘制面板的静态图层：标题和各区域边框
+    """
+    image_res = BuildImage.new("RGBA", (1720, 1650), BLACK)
+    draw_text(
+        image_res, (100, 180), "角色面板", fontsize=92, fontname=fontname, fill=WHITE
+    )
+    # preview
+    image_res.draw_rounded_rectangle(
+        (100, 300, 480, 818), radius=30, outline=GRAY, width=3
+    )
+    # skill
+    for i in range(4):
+        y_item = 850 + 100 * i
+        image_res.draw_rounded_rectangle(
+            (100, y_item, 370, y_item + 90), radius=15, outline=GRAY, width=2
+        )
+    # skill tree
+    image_res.draw_rounded_rectangle(
+        (380, 850, 730, 1240), radius=15, outline=GRAY, width=2
+    )
+    # light cone
+    image_res.draw_rounded_rectangle(
+        (750, 850, 1000, 1240), radius=15, outline=GRAY, width=2
+    )
+    # properties
+    image_res.draw_rounded_rectangle(
+        (100, 1260, 1000, 1490), radius=15, outline=GRAY, width=2
+    )
+    # relic
+    for i in range(0, 6):
+        x_index = 1040 + 305 * (i // 3)
+        y_index = 300 + 320 * (i % 3)
+        image_res.draw_rounded_rectangle(
+            (x_index, y_index, x_index + 290, y_index + 300),
+            radius=15,
+            outline=GRAY,
+            width=2,
+        )
+    # relic set
+    for i in range(3):
+        y_item = 1260 + 80 * i
+        image_res.draw_rounded_rectangle(
+            (1040, y_item, 1380, y_item + 70), radius=15, outline=GRAY, width=2
+        )
+    # relic score
+    image_res.draw_rounded_rectangle(
+        (1395, 1260, 1635, 1490), radius=15, outline=GRAY, width=2
+    )
+    draw_text(
+        image_res,
+        (1425, 1385, 1605, 1470),
+        "SRS-N 评分",
+        fontname=fontname,
+        max_fontsize=36,
+        fill=WHITE,
+    )
+    return image_res
+
+
+def draw_srpanel_img(
+    player_info: PlayerInfo, character_info: CharacterInfo, score: ScoreFile
 ) -> Optional[BytesIO]:
     uid = player_info.uid
     time = character_info.time
@@ -64,59 +171,65 @@ async def get_srpanel_img(
     rank_icons = list(character_info.rank_icons)
     rank_images: list[Image.Image] = []
     for i in range(len(rank_icons)):
-        rank_icon = await get_image(rank_icons[i])
-        if rank_icon:
-            rank_image = (
-                BuildImage(rank_icon)
-                .resize((64, 64))
-                .draw_arc((0, 0, 64, 64), 0, 360, width=2, fill=WHITE)
-                .image
-            )
-            if i >= rank:
-                alpha = ImageEnhance.Brightness(rank_image)
-                rank_image = alpha.enhance(0.3)
+        rank_image = get_image(
+            rank_icons[i], size=(64, 64), border=2, brightness=0.3 if i >= rank else 1.0
+        )
+        if rank_image:
             rank_images.append(rank_image)
-    image_res = BuildImage.new("RGBA", (1720, 1650), BLACK)
+    image_res = srres.get_template("srpanel", draw_srpanel_template)
     # title
-    title_image_bg = await get_image("icon/logo/bg.png")
-    title_image = await get_image("icon/logo/cn.png")
+    title_image_bg = get_image("icon/logo/bg.png", size=(300, 150))
+    title_image = get_image("icon/logo/cn.png", size=(300, 150))
     if title_image_bg and title_image:
-        title_image_bg = title_image_bg.resize((300, 150))
         image_res.paste(title_image_bg, (700, 40), alpha=True)
-        title_image = title_image.resize((300, 150))
         image_res.paste(title_image, (700, 40), alpha=True)
-    image_res.draw_text(
-        (100, 180), "角色面板", fontsize=92, fontname=fontname, fill=WHITE
-    )
     # uid
-    image_res.draw_text(
-        (550, 224), f"UID:{uid}", fontsize=48, fontname=fontname, fill=WHITE
+    draw_text(
+        image_res, (550, 224), f"UID:{uid}", fontsize=48, fontname=fontname, fill=WHITE
     )
     # path
     path_image = (
-        await get_image(character_info.path.icon) if character_info.path else None
+        get_image(character_info.path.icon, size=(64, 64))
+        if character_info.path
+        else None
     )
     if path_image:
-        path_image = path_image.resize((64, 64))
         image_res.paste(path_image, (950, 220), alpha=True)
-        image_res.draw_text(
-            (1030, 228), str(path), fontname=fontname, fontsize=48, fill=WHITE
+        draw_text(
+            image_res,
+            (1030, 228),
+            str(path),
+            fontname=fontname,
+            fontsize=48,
+            fill=WHITE,
         )
     # element
     element_image = (
-        await get_image(character_info.element.icon) if character_info.element else None
+        get_image(character_info.element.icon, size=(64, 64))
+        if character_info.element
+        else None
     )
     if element_image:
-        element_image = element_image.resize((64, 64))
         image_res.paste(element_image, (1170, 220), alpha=True)
-        image_res.draw_text(
-            (1250, 228), str(element), fontname=fontname, fontsize=48, fill=WHITE
+        draw_text(
+            image_res,
+            (1250, 228),
+            str(element),
+            fontname=fontname,
+            fontsize=48,
+            fill=WHITE,
         )
-        image_res.draw_text(
-            (1250, 228), str(element), fontname=fontname, fontsize=48, fill=f"{color}88"
+        draw_text(
+            image_res,
+            (1250, 228),
+            str(element),
+            fontname=fontname,
+            fontsize=48,
+            fill=f"{color}88",
         )
     # level
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (1420, 200),
         f"Lv.{level}",
         fontname=fontname,
@@ -124,15 +237,16 @@ async def get_srpanel_img(
         fill=WHITE,
     )
     # preview
-    image_res.draw_rounded_rectangle(
-        (100, 300, 480, 818), radius=30, outline=GRAY, width=3
-    )
-    preview_image = await get_image(character_info.preview)
+    preview_image = get_image(character_info.preview, size=(374, 512))
     if preview_image:
-        preview_image = preview_image.resize((374, 512))
         image_res.paste(preview_image, (103, 303), alpha=True)
-    image_res.draw_text(
-        (110, 728, 470, 808), name, max_fontsize=52, fontname=fontname, fill=WHITE
+    draw_text(
+        image_res,
+        (110, 728, 470, 808),
+        name,
+        max_fontsize=52,
+        fontname=fontname,
+        fill=WHITE,
     )
     # rank
     y_index = 310
@@ -150,7 +264,8 @@ async def get_srpanel_img(
             outline=GRAY,
             width=2,
         )
-        image_res.draw_text(
+        draw_text(
+            image_res,
             (x_index + 20, y_index + 12),
             attr.name,
             fontname=fontname,
@@ -159,7 +274,8 @@ async def get_srpanel_img(
         )
         # basic value
         if not attr.percent:
-            image_res.draw_text(
+            draw_text(
+                image_res,
                 (x_index + 250, y_index + 6),
                 attr.display,
                 fontname=fontname,
@@ -171,7 +287,8 @@ async def get_srpanel_img(
         for addi in additions:
             if addi.name == attr.name:
                 boost = addi.value
-                image_res.draw_text(
+                draw_text(
+                    image_res,
                     (x_index + 300, y_index + 20),
                     f"+{addi.display}",
                     fontname=fontname,
@@ -183,7 +300,8 @@ async def get_srpanel_img(
         total_str = (
             str(int(total)) if not attr.percent else f"{format(total*100,'.1f')}%"
         )
-        image_res.draw_text(
+        draw_text(
+            image_res,
             (x_index + 160, y_index + 12),
             total_str,
             fontname=fontname,
@@ -204,14 +322,16 @@ async def get_srpanel_img(
                 outline=GRAY,
                 width=2,
             )
-            image_res.draw_text(
+            draw_text(
+                image_res,
                 (x_index + 20, y_index + 12),
                 name,
                 fontname=fontname,
                 fontsize=24,
                 fill=WHITE,
             )
-            image_res.draw_text(
+            draw_text(
+                image_res,
                 (x_index + 220, y_index + 12),
                 addi.display,
                 fontname=fontname,
@@ -225,41 +345,31 @@ async def get_srpanel_img(
     y_step = 100
     for i in range(4):
         y_item = y_index + y_step * i
-        y_next = y_item + y_step
-        image_res.draw_rounded_rectangle(
-            (x_index, y_item, x_index + 270, y_next - 10),
-            radius=15,
-            outline=GRAY,
-            width=2,
-        )
         if len(skills) < i:
-            image_res.draw_text(
+            draw_text(
+                image_res,
                 (x_index + 10, y_item + 10, x_index + 260, y_item + 80),
                 "无法获取技能信息",
                 fontname=fontname,
                 max_fontsize=36,
                 fill=WHITE,
             )
-        item_icon = await get_image(skills[i].icon)
+        item_icon = get_image(skills[i].icon, size=(64, 64), border=2)
         if item_icon:
-            item_icon = (
-                BuildImage(item_icon)
-                .resize((64, 64))
-                .draw_arc((0, 0, 64, 64), 0, 360, width=2, fill=WHITE)
-                .image
-            )
             image_res.paste(item_icon, (x_index + 15, y_item + 13), alpha=True)
         name = str(skills[i].name)
         if len(name) > 6:
             name = name[:5] + "..."
-        image_res.draw_text(
+        draw_text(
+            image_res,
             (x_index + 80, y_item + 10, x_index + 260, y_item + 40),
             name,
             fontname=fontname,
             max_fontsize=30,
             fill=WHITE,
         )
-        image_res.draw_text(
+        draw_text(
+            image_res,
             (x_index + 80, y_item + 40, x_index + 260, y_item + 80),
             f"Lv.{int(skills[i].level)}",
             fontname=fontname,
@@ -271,29 +381,19 @@ async def get_srpanel_img(
     y_index = 850
     y_step = 100
     point_groups: list[set] = []
-    image_res.draw_rounded_rectangle(
-        (x_index, y_index, x_index + 350, y_index + y_step * 4 - 10),
-        radius=15,
-        outline=GRAY,
-        width=2,
-    )
     for i in range(4, 8):
         y_item = y_index + y_step * (i - 4)
         y_next = y_item + y_step
         if len(skill_trees) <= i:
             break
         point_groups.append({skill_trees[i].id})
-        item_icon = await get_image(skill_trees[i].icon)
+        item_icon = get_image(
+            skill_trees[i].icon,
+            size=(64, 64),
+            border=2,
+            brightness=0.3 if skill_trees[i].level == 0 else 1.0,
+        )
         if item_icon:
-            item_icon = (
-                BuildImage(item_icon)
-                .resize((64, 64))
-                .draw_arc((0, 0, 64, 64), 0, 360, width=2, fill=WHITE)
-                .image
-            )
-            if skill_trees[i].level == 0:
-                alpha = ImageEnhance.Brightness(item_icon)
-                item_icon = alpha.enhance(0.3)
             image_res.paste(item_icon, (x_index + 20, y_item + 13), alpha=True)
     x_index = 420
     x_step = 80
@@ -305,17 +405,13 @@ async def get_srpanel_img(
             if skill_trees[i].parent in group:
                 group.add(skill_trees[i].id)
                 x_offset = len(group) - 1
-                item_icon = await get_image(skill_trees[i].icon)
+                item_icon = get_image(
+                    skill_trees[i].icon,
+                    size=(48, 48),
+                    border=2,
+                    brightness=0.3 if skill_trees[i].level == 0 else 1.0,
+                )
                 if item_icon:
-                    item_icon = (
-                        BuildImage(item_icon)
-                        .resize((48, 48))
-                        .draw_arc((0, 0, 48, 48), 0, 360, width=2, fill=WHITE)
-                        .image
-                    )
-                    if skill_trees[i].level == 0:
-                        alpha = ImageEnhance.Brightness(item_icon)
-                        item_icon = alpha.enhance(0.3)
                     if not (x_offset == 1 and skill_trees[i].parent is None):
                         image_res.draw_line(
                             (
@@ -336,32 +432,28 @@ async def get_srpanel_img(
     # light cone
     x_index = 750
     y_index = 850
-    image_res.draw_rounded_rectangle(
-        (x_index, y_index, x_index + 250, y_index + 390),
-        radius=15,
-        outline=GRAY,
-        width=2,
-    )
     if light_cone:
-        light_cone_image = await get_image(light_cone.icon)
+        light_cone_image = get_image(light_cone.icon, size=(200, 200))
         if light_cone_image:
-            light_cone_image = light_cone_image.resize((200, 200))
             image_res.paste(light_cone_image, (x_index + 25, y_index + 20), alpha=True)
-        image_res.draw_text(
+        draw_text(
+            image_res,
             (x_index + 20, y_index + 220, x_index + 230, y_index + 270),
             light_cone.name,
             fontname=fontname,
             max_fontsize=36,
             fill=WHITE,
         )
-        image_res.draw_text(
+        draw_text(
+            image_res,
             (x_index + 20, y_index + 270, x_index + 230, y_index + 310),
             f"叠影 {roman_dict[light_cone.rank]} 阶",
             fontname=fontname,
             max_fontsize=24,
             fill=WHITE,
         )
-        image_res.draw_text(
+        draw_text(
+            image_res,
             (x_index + 20, y_index + 310, x_index + 230, y_index + 370),
             f"Lv.{light_cone.level}",
             fontname=fontname,
@@ -369,7 +461,8 @@ async def get_srpanel_img(
             fill=WHITE,
         )
     else:
-        image_res.draw_text(
+        draw_text(
+            image_res,
             (x_index + 20, y_index + 20, x_index + 230, y_index + 370),
             "未装备光锥",
             fontname=fontname,
@@ -381,22 +474,16 @@ async def get_srpanel_img(
     y_index = 1260
     x_step = 180
     y_step = 70
-    image_res.draw_rounded_rectangle(
-        (x_index, y_index, x_index + 900, y_index + 230),
-        radius=15,
-        outline=GRAY,
-        width=2,
-    )
     for i, prop in enumerate(properties):
         if i >= 15:
             break
         x_item = x_index + i % 5 * x_step
         y_item = y_index + i // 5 * y_step
-        prop_image = await get_image(prop.icon)
+        prop_image = get_image(prop.icon, size=(52, 52))
         if prop_image:
-            prop_image = prop_image.resize((52, 52))
             image_res.paste(prop_image, (x_item + 20, y_item + 18), alpha=True)
-        image_res.draw_text(
+        draw_text(
+            image_res,
             (x_item + 80, y_item + 20, x_item + 170, y_item + 70),
             prop.display,
             fontname=fontname,
@@ -410,14 +497,9 @@ async def get_srpanel_img(
     for i in range(0, 6):
         x_index = 1040 + 305 * (i // 3)
         y_index = 300 + 320 * (i % 3)
-        image_res.draw_rounded_rectangle(
-            (x_index, y_index, x_index + 290, y_index + 300),
-            radius=15,
-            outline=GRAY,
-            width=2,
-        )
         if i >= len(relic):
-            image_res.draw_text(
+            draw_text(
+                image_res,
                 (x_index + 20, y_index + 20, x_index + 270, y_index + 280),
                 "该位置未装备遗器",
                 fontname=fontname,
@@ -428,11 +510,11 @@ async def get_srpanel_img(
             relic_info = relic[i]
             relic_type = get_relic_type(relic_info.id)
             relic_icon = relic_info.icon
-            relic_image = await get_image(relic_icon)
+            relic_image = get_image(relic_icon, size=(64, 64))
             if relic_image:
-                relic_image = relic_image.resize((64, 64))
                 image_res.paste(relic_image, (x_index + 30, y_index + 30), alpha=True)
-            image_res.draw_text(
+            draw_text(
+                image_res,
                 (x_index + 20, y_index + 120, x_index + 270, y_index + 156),
                 relic_info.name,
                 fontname=fontname,
@@ -441,21 +523,24 @@ async def get_srpanel_img(
                 stroke_fill=WHITE,
                 stroke_ratio=0.03,
             )
-            image_res.draw_text(
+            draw_text(
+                image_res,
                 (x_index + 130, y_index + 20, x_index + 270, y_index + 80),
                 relic_info.main_affix.display if relic_info.main_affix else "--",
                 fontname=fontname,
                 max_fontsize=52,
                 fill=WHITE,
             )
-            image_res.draw_text(
+            draw_text(
+                image_res,
                 (x_index + 94, y_index + 80, x_index + 130, y_index + 108),
                 f"+{relic_info.level}",
                 fontname=fontname,
                 max_fontsize=24,
                 fill=WHITE,
             )
-            image_res.draw_text(
+            draw_text(
+                image_res,
                 (x_index + 130, y_index + 80, x_index + 270, y_index + 108),
                 (
                     str(relic_info.main_affix.name).replace("属性伤害提高", "增伤")
@@ -476,13 +561,13 @@ async def get_srpanel_img(
                     )
                     weight = 127 + int(128 * score[cid].weight[affix.type])
                     FILL = (weight, weight, weight)
-                affix_image = await get_image(affix.icon)
+                affix_image = get_image(affix.icon, size=(32, 32))
                 if affix_image:
-                    affix_image = affix_image.resize((32, 32))
                     image_res.paste(
                         affix_image, (x_index + 30, y_index_item), alpha=True
                     )
-                image_res.draw_text(
+                draw_text(
+                    image_res,
                     (x_index + 70, y_index_item),
                     affix.name,
                     fontname=fontname,
@@ -490,14 +575,16 @@ async def get_srpanel_img(
                     fill=FILL,
                 )
                 if affix.count > 1:
-                    image_res.draw_text(
+                    draw_text(
+                        image_res,
                         (x_index + 175, y_index_item + 10),
                         f"x{affix.count}",
                         fontname=fontname,
                         fontsize=14,
                         fill=FILL,
                     )
-                image_res.draw_text(
+                draw_text(
+                    image_res,
                     (x_index + 200, y_index_item),
                     affix.display,
                     fontname=fontname,
@@ -518,7 +605,8 @@ async def get_srpanel_img(
                 )
                 relic_score[relic_info.id] = relic_item_score * 10
                 score_disp = format(relic_score[relic_info.id], ".1f")
-                image_res.draw_text(
+                draw_text(
+                    image_res,
                     (x_index + 98, y_index + 20, x_index + 128, y_index + 48),
                     score_disp,
                     fontname=fontname,
@@ -533,24 +621,13 @@ async def get_srpanel_img(
     for i in range(3):
         y_item = y_index + y_step * i
         y_next = y_item + y_step
-        image_res.draw_rounded_rectangle(
-            (
-                x_index,
-                y_item,
-                x_index + 340,
-                y_next - 10,
-            ),
-            radius=15,
-            outline=GRAY,
-            width=2,
-        )
         if len(relic_set) > i:
             set_icon = relic_set[i].icon
-            set_image = await get_image(set_icon)
+            set_image = get_image(set_icon, size=(40, 40))
             if set_image:
-                set_image = set_image.resize((40, 40))
                 image_res.paste(set_image, (x_index + 30, y_item + 15), alpha=True)
-            image_res.draw_text(
+            draw_text(
+                image_res,
                 (
                     x_index + 80,
                     y_item,
@@ -565,15 +642,15 @@ async def get_srpanel_img(
             if relic_set[i].properties:
                 set_prop_icon = relic_set[i].properties[0].icon
                 set_prop_value = relic_set[i].properties[0].display
-                set_prop_image = await get_image(set_prop_icon)
+                set_prop_image = get_image(set_prop_icon, size=(40, 40))
                 if set_prop_image:
-                    set_prop_image = set_prop_image.resize((40, 40))
                     image_res.paste(
                         set_prop_image,
                         (x_index + 200, y_item + 15),
                         alpha=True,
                     )
-                    image_res.draw_text(
+                    draw_text(
+                        image_res,
                         (
                             x_index + 240,
                             y_item,
@@ -586,7 +663,8 @@ async def get_srpanel_img(
                         fill=WHITE,
                     )
             else:
-                image_res.draw_text(
+                draw_text(
+                    image_res,
                     (
                         x_index + 200,
                         y_item,
@@ -599,7 +677,8 @@ async def get_srpanel_img(
                     fill=WHITE,
                 )
         else:
-            image_res.draw_text(
+            draw_text(
+                image_res,
                 (
                     x_index + 20,
                     y_item,
@@ -614,27 +693,16 @@ async def get_srpanel_img(
     # relic score
     x_index += 355
     y_index = 1260
-    image_res.draw_rounded_rectangle(
-        (x_index, y_index, x_index + 240, y_index + 230),
-        radius=15,
-        outline=GRAY,
-        width=2,
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (x_index + 30, y_index + 20, x_index + 210, y_index + 125),
         f"{relic_score_all}/10" if not relic_score_all.startswith("0") else "--",
         fontname=fontname,
         max_fontsize=64,
         fill=WHITE,
     )
-    image_res.draw_text(
-        (x_index + 30, y_index + 125, x_index + 210, y_index + 210),
-        "SRS-N 评分",
-        fontname=fontname,
-        max_fontsize=36,
-        fill=WHITE,
-    )
-    image_res.draw_text(
+    draw_text(
+        image_res,
         (80, 1550, 1640, 1600),
         f"Created by Mar-7th/March7th. Panel data provided by MiHoMo API. Updated at {time}",
         fontname=fontname,
@@ -1,3 +1,6 @@
+import asyncio
+from typing import Optional
+
 from nonebot.log import logger
 from nonebot.permission import SUPERUSER
 from nonebot.plugin import PluginMetadata
@@ -10,7 +13,10 @@ require("nonebot_plugin_apscheduler")
 from nonebot_plugin_apscheduler import scheduler
 from nonebot_plugin_saa import Text, MessageFactory
 
+from .config import plugin_config
 from .data_source import StarRailRes
+from .text import draw_text as draw_text
+from .text import text_image as text_image
 
 __plugin_meta__ = PluginMetadata(
     name="StarRailRes",
@@ -19,6 +25,7 @@ __plugin_meta__ = PluginMetadata(
 更新索引: srupdate *superuser
 预下载攻略: srgupdate *superuser
 强制更新攻略: srfupdate *superuser
+预下载图标: srwarmup *superuser
 """,
     extra={
         "version": "1.0",
@@ -26,23 +33,35 @@ __plugin_meta__ = PluginMetadata(
 更新索引: srupdate [color=gray]*superuser[/color]
 预下载攻略: srgupdate [color=gray]*superuser[/color]
 强制更新攻略: srfupdate [color=gray]*superuser[/color]
+预下载图标: srwarmup [color=gray]*superuser[/color]
 """,
     },
 )
 
 srres = StarRailRes()
+warmup_task: Optional[asyncio.Task] = None
 
 driver = get_driver()
 
 
 @driver.on_startup
 async def _():
+    global warmup_task
     if await srres.update():
         logger.info("游戏资源列表加载完成")
+        if plugin_config.sr_res_warmup_on_startup:
+            warmup_task = asyncio.create_task(srres.warmup())
     else:
         logger.error("游戏资源列表加载失败，请检查网络连接")
     scheduler.add_job(srres.update, "cron", day=1, id="srres_update")
     logger.info("游戏资源列表自动更新任务已添加")
+    if plugin_config.sr_res_lazy_idle_ttl > 0:
+        scheduler.add_job(srres.sweep_indexes, "interval", minutes=1, id="srres_sweep")
+
+
+@driver.on_shutdown
+async def _():
+    await srres.close()
 
 
 sr_update = on_command(
@@ -57,6 +76,10 @@ sr_guide_force_update = on_command(
     "srfupdate", aliases={"强制更新星铁攻略"}, permission=SUPERUSER, block=True
 )
 
+sr_warmup = on_command(
+    "srwarmup", aliases={"预下载星铁图标"}, permission=SUPERUSER, block=True
+)
+
 
 @sr_update.handle()
 async def _():
@@ -92,3 +115,16 @@ async def _():
     else:
         msg_builder = MessageFactory([Text("攻略文件强制更新完成")])
     await msg_builder.finish()
+
+
+@sr_warmup.handle()
+async def _():
+    msg_builder = MessageFactory([Text("开始预下载图标文件，可能需要较长时间")])
+    await msg_builder.send()
+    result = await srres.warmup()
+    msg = (
+        f"图标预下载完成，共 {result['total']} 个文件，缺失 {result['missing']} 个，"
+        f"下载 {result['downloaded']} 个，失败 {result['failed']} 个，"
+        f"共 {result['bytes'] / 1024 / 1024:.2f}MB，耗时 {result['elapsed']:.1f}s"
+    )
+    await MessageFactory([Text(msg)]).finish()
@@ -10,6 +10,23 @@ class Config(BaseModel):
         "https://raw.githubusercontent.com/Mar-7th/StarRailRes/master"
     )
     sr_wiki_providers: list[Literal["Nwflower", "Gamer", "OriginMirror"]] = ["Nwflower"]
+    sr_res_concurrency: int = 8
+    sr_res_max_connections: int = 20
+    sr_res_max_keepalive: int = 10
+    sr_res_http2: bool = False
+    sr_res_snapshot: bool = True
+    sr_res_compact: bool = False
+    sr_res_warmup_on_startup: bool = False
+    sr_res_warmup_bandwidth: int = 0
+    sr_res_image_cache_size: int = 64
+    sr_res_render_workers: int = 0
+    sr_res_lazy_indexes: list[str] = [
+        "achievements",
+        "character_promotions",
+        "light_cone_promotions",
+        "relic_sub_affixes",
+    ]
+    sr_res_lazy_idle_ttl: int = 0
 
 
 plugin_config = get_plugin_config(Config)
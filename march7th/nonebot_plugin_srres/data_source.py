@@ -1,16 +1,32 @@
+import os
 import json
+import time
+import pickle
 import random
 import asyncio
+import hashlib
+import tempfile
+import functools
+import contextlib
+import importlib.util
 from pathlib import Path
-from typing import Any, Optional, TypedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar, Callable, Optional, TypedDict, cast
 
 import httpx
+from PIL import Image
 from nonebot.log import logger
-from nonebot.compat import type_validate_python
+from pil_utils import BuildImage
 from nonebot_plugin_localstore import get_data_dir
+from nonebot.compat import PYDANTIC_V2, type_validate_python
 
+from .lazy import LazyResIndex
 from .config import plugin_config
 from .model.paths import PathIndex
+from .text import clear_text_cache
+from .image_cache import ImageCache
+from .template import TemplateCache
+from .model.compact import to_compact
 from .model.elements import ElementIndex
 from .model.properties import PropertyIndex
 from .model.achievements import AchievementIndex
@@ -36,6 +52,7 @@ from .model.characters import (
 plugin_data_dir: Path = get_data_dir("nonebot_plugin_srres")
 index_dir = plugin_data_dir / "index"
 font_dir = plugin_data_dir / "font"
+snapshot_dir = plugin_data_dir / "snapshot"
 
 
 ResFiles = {
@@ -61,6 +78,41 @@ ResFiles = {
 NicknameFile = "nickname.json"
 VersionFile = "info.json"
 FontFile = "SDK_SC_Web.ttf"
+MetaFile = "meta.json"
+SnapshotVersion = 1
+
+
+def get_schema_hash() -> str:
+    """
+    计算索引模型的结构哈希，模型定义或 pydantic 主版本变化时快照失效
+    """
+    sha256 = hashlib.sha256(f"{SnapshotVersion}:{PYDANTIC_V2}".encode())
+    for file in sorted((Path(__file__).parent / "model").glob("*.py")):
+        sha256.update(file.name.encode())
+        sha256.update(file.read_bytes())
+    return sha256.hexdigest()
+
+
+SchemaHash = get_schema_hash()
+
+
+T = TypeVar("T")
+
+
+class WarmupResult(TypedDict):
+    total: int
+    missing: int
+    downloaded: int
+    failed: int
+    bytes: int
+    elapsed: float
+
+
+class ResFileMeta(TypedDict, total=False):
+    etag: str
+    last_modified: str
+    size: int
+    sha256: str
 
 
 class ResIndexType(TypedDict):
@@ -83,26 +135,47 @@ class ResIndexType(TypedDict):
 
 
 class StarRailRes:
-    ResIndex: ResIndexType = {
-        "characters": {},
-        "character_ranks": {},
-        "character_skills": {},
-        "character_skill_trees": {},
-        "character_promotions": {},
-        "light_cones": {},
-        "light_cone_ranks": {},
-        "light_cone_promotions": {},
-        "relics": {},
-        "relic_sets": {},
-        "relic_main_affixes": {},
-        "relic_sub_affixes": {},
-        "paths": {},
-        "elements": {},
-        "properties": {},
-        "achievements": {},
-    }
     Nickname: dict[str, Any] = {}
     NicknameRev: dict[str, Any] = {}
+    Meta: Optional[dict[str, ResFileMeta]] = None
+    _loaded: frozenset[str] = frozenset()
+    _reload_lock: Optional[asyncio.Lock] = None
+    _client: Optional[httpx.AsyncClient] = None
+    _meta_save_handle: Optional[asyncio.TimerHandle] = None
+    _render_executor: Optional[ThreadPoolExecutor] = None
+    _version: Optional[str] = None
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Future[bool]] = {}
+        self.image_cache = ImageCache(plugin_config.sr_res_image_cache_size * 1024**2)
+        self.templates = TemplateCache()
+        lazy = set(plugin_config.sr_res_lazy_indexes)
+        if unknown := lazy - ResFiles:
+            logger.warning(f"未知的懒加载索引: {', '.join(sorted(unknown))}")
+        self._index = LazyResIndex(
+            ResFiles - {"nickname"}, self.load_index_file, lazy - {"nickname"}
+        )
+
+    @property
+    def ResIndex(self) -> ResIndexType:
+        """
+        当前索引，懒加载索引在第一次访问时读取
+
+        在事件循环中读取懒加载索引前应先调用 `ensure_index`
+        """
+        return cast(ResIndexType, self._index)
+
+    async def ensure_index(self, *names: str) -> None:
+        """
+        在工作线程中加载尚未加载的懒加载索引，避免首次访问时阻塞事件循环
+
+        Args:
+            names: 即将读取的索引名称
+        """
+        index = self._index
+        for name in names:
+            if name in index.lazy and not index.is_loaded(name):
+                await asyncio.to_thread(index.__getitem__, name)
 
     def proxy_url(self, url: str) -> str:
         if plugin_config.github_proxy:
@@ -112,34 +185,266 @@ class StarRailRes:
             return f"{github_proxy}/{url}"
         return url
 
+    def get_client(self) -> httpx.AsyncClient:
+        """
+        获取共享的 HTTP 客户端，复用连接池
+        """
+        if self._client is None or self._client.is_closed:
+            http2 = plugin_config.sr_res_http2
+            if http2 and importlib.util.find_spec("h2") is None:
+                logger.warning("未安装 h2，无法启用 HTTP/2，请安装 httpx[http2]")
+                http2 = False
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=plugin_config.sr_res_max_connections,
+                    max_keepalive_connections=plugin_config.sr_res_max_keepalive,
+                ),
+                timeout=10,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """
+        关闭共享的 HTTP 客户端和绘图线程池
+        """
+        self.flush_meta()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._render_executor is not None:
+            self._render_executor.shutdown(wait=False)
+            self._render_executor = None
+
+    def get_render_executor(self) -> ThreadPoolExecutor:
+        """
+        获取共享的绘图线程池
+        """
+        if self._render_executor is None:
+            workers = plugin_config.sr_res_render_workers
+            self._render_executor = ThreadPoolExecutor(
+                max_workers=workers if workers > 0 else min(4, os.cpu_count() or 1),
+                thread_name_prefix="srres-render",
+            )
+        return self._render_executor
+
+    async def run_render(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        在绘图线程池中执行同步绘图函数，避免阻塞事件循环
+
+        绘图函数应只读取已下载的资源，资源需在调用前异步准备好。
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.get_render_executor(), functools.partial(func, *args, **kwargs)
+        )
+
+    async def request(
+        self, url: str, headers: Optional[dict[str, str]] = None
+    ) -> Optional[httpx.Response]:
+        client = self.get_client()
+        for i in range(3):
+            try:
+                resp = await client.get(url, headers=headers)
+                if resp.status_code == 304:
+                    return resp
+                resp.raise_for_status()
+                return resp
+            except Exception as e:
+                logger.warning(f"Error downloading {url}, retry {i}/3: {e}")
+                await asyncio.sleep(2)
+        logger.error(f"Error downloading {url}, all attempts failed.")
+        return None
+
     async def download(self, url: str) -> Optional[bytes]:
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            for i in range(3):
+        resp = await self.request(url)
+        return resp.content if resp is not None else None
+
+    def load_meta(self) -> dict[str, ResFileMeta]:
+        """
+        读取缓存文件元数据（ETag、Last-Modified、大小、sha256）
+        """
+        if self.Meta is None:
+            self.Meta = {}
+            if (plugin_data_dir / MetaFile).exists():
                 try:
-                    resp = await client.get(url, timeout=10)
-                    resp.raise_for_status()
-                    return resp.content
-                except Exception as e:
-                    logger.warning(f"Error downloading {url}, retry {i}/3: {e}")
-                    await asyncio.sleep(2)
-            logger.error(f"Error downloading {url}, all attempts failed.")
+                    with open(plugin_data_dir / MetaFile, encoding="utf-8") as f:
+                        self.Meta = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.warning(f"缓存元数据读取失败，将重新下载文件: {e}")
+        return self.Meta
+
+    def save_meta(self) -> None:
+        if self.Meta is not None:
+            self.write_file(
+                plugin_data_dir / MetaFile,
+                json.dumps(self.Meta, ensure_ascii=False).encode("utf-8"),
+            )
+
+    def flush_meta(self) -> None:
+        """
+        立即写入尚未保存的元数据
+        """
+        if self._meta_save_handle is not None:
+            self._meta_save_handle.cancel()
+            self._meta_save_handle = None
+            self.save_meta()
+
+    def schedule_save_meta(self) -> None:
+        """
+        合并短时间内的多次元数据修改，延迟写入磁盘
+        """
+        if self._meta_save_handle is not None:
+            return
+
+        def _save():
+            self._meta_save_handle = None
+            self.save_meta()
+
+        self._meta_save_handle = asyncio.get_running_loop().call_later(1, _save)
+
+    async def download_file(
+        self, file: str, path: Path, url: str, revalidate: bool = True
+    ) -> Optional[bool]:
+        """
+        下载文件，本地文件完整时使用 ETag/Last-Modified 条件请求
+
+        Args:
+            file: 元数据中的文件名
+            path: 本地保存路径
+            url: 下载地址
+            revalidate: 是否允许条件请求
+
+        Returns:
+            文件有更新时返回 True，未修改时返回 False，下载失败时返回 None
+        """
+        meta = self.load_meta()
+        headers: dict[str, str] = {}
+        file_meta = meta.get(file, {})
+        if (
+            revalidate
+            and file_meta
+            and path.exists()
+            and path.stat().st_size == file_meta.get("size")
+        ):
+            if "etag" in file_meta:
+                headers["If-None-Match"] = file_meta["etag"]
+            if "last_modified" in file_meta:
+                headers["If-Modified-Since"] = file_meta["last_modified"]
+        resp = await self.request(url, headers)
+        if resp is None:
             return None
+        if resp.status_code == 304:
+            logger.debug(f"{file} 未修改")
+            return False
+        data = resp.content
+        sha256 = hashlib.sha256(data).hexdigest()
+        changed = not path.exists() or file_meta.get("sha256") != sha256
+        if changed or path.stat().st_size != len(data):
+            self.write_file(path, data)
+        file_meta = {"size": len(data), "sha256": sha256}
+        if etag := resp.headers.get("ETag"):
+            file_meta["etag"] = etag
+        if last_modified := resp.headers.get("Last-Modified"):
+            file_meta["last_modified"] = last_modified
+        meta[file] = file_meta
+        self.schedule_save_meta()
+        return changed
 
-    async def cache(self, file: str, refresh: bool = False):
-        status = True
-        if not (plugin_data_dir / file).exists() or refresh:
-            (plugin_data_dir / file).parent.mkdir(parents=True, exist_ok=True)
-            logger.debug(f"Downloading {file}...")
-            data = await self.download(
-                self.proxy_url(f"{plugin_config.sr_wiki_url}/{file}")
+    def write_file(self, path: Path, data: bytes) -> None:
+        """
+        原子写入文件，先写入同目录临时文件再重命名
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self.image_cache.invalidate(path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+
+    async def cache(self, file: str, refresh: bool = False) -> bool:
+        if (plugin_data_dir / file).exists() and not refresh:
+            return True
+        # 同一文件的并发请求共享同一次下载
+        task = self._inflight.get(file)
+        if task is None:
+            task = asyncio.ensure_future(self._cache(file))
+            self._inflight[file] = task
+            task.add_done_callback(lambda _: self._inflight.pop(file, None))
+        return await asyncio.shield(task)
+
+    async def _cache(self, file: str) -> bool:
+        logger.debug(f"Downloading {file}...")
+        result = await self.download_file(
+            file,
+            plugin_data_dir / file,
+            self.proxy_url(f"{plugin_config.sr_wiki_url}/{file}"),
+        )
+        if result is None:
+            logger.error(f"Failed to download {file}.")
+            return False
+        return True
+
+    def load_image(
+        self,
+        path: Path,
+        size: Optional[tuple[int, int]] = None,
+        circle: bool = False,
+        border: int = 0,
+        brightness: float = 1.0,
+    ) -> Image.Image:
+        """
+        通过解码图片缓存读取图片，返回的图片不应原地修改
+
+        Args:
+            path: 图片路径
+            size: 目标尺寸
+            circle: 是否裁剪为圆形
+            border: 圆形描边宽度
+            brightness: 亮度系数
+        """
+        return self.image_cache.load(path, size, circle, border, brightness)
+
+    async def get_image(
+        self,
+        file: str,
+        size: Optional[tuple[int, int]] = None,
+        circle: bool = False,
+        border: int = 0,
+        brightness: float = 1.0,
+    ) -> Optional[Image.Image]:
+        """
+        下载资源文件并通过解码图片缓存读取
+
+        Args:
+            file: 资源文件相对路径
+        """
+        if file and await self.cache(file):
+            return self.load_image(
+                plugin_data_dir / file, size, circle, border, brightness
             )
-            if not data:
-                logger.error(f"Failed to download {file}.")
-                status = False
-            else:
-                with open(plugin_data_dir / file, "wb") as f:
-                    f.write(data)
-        return status
+        return None
+
+    def get_template(
+        self, name: str, draw: Callable[..., BuildImage], *args: Any
+    ) -> BuildImage:
+        """
+        获取静态图层的副本，资源版本或字体变化时重新绘制
+
+        Args:
+            name: 图层名称
+            draw: 绘制函数
+            args: 绘制函数的参数
+        """
+        return self.templates.get(
+            (self.get_version(), self.get_font()), name, draw, *args
+        )
 
     async def get_icon(
         self, name: Optional[str] = None, id: Optional[str] = None
@@ -240,7 +545,7 @@ class StarRailRes:
                 if any(p in n for p in plugin_config.sr_wiki_providers)
             ]
             if overview:
-                if isinstance(overview, list):
+                if isinstance(overview, (list, tuple)):
                     overview = random.choice(overview)
                 if await self.cache(overview):
                     return (plugin_data_dir / overview).read_bytes()
@@ -255,7 +560,7 @@ class StarRailRes:
         if id in self.ResIndex["characters"]:
             overview = self.ResIndex["characters"][id].guide_overview
             if overview:
-                if isinstance(overview, list):
+                if isinstance(overview, (list, tuple)):
                     overview = random.choice(overview)
                 return self.proxy_url(f"{plugin_config.sr_wiki_url}/{overview}")
         return None
@@ -272,7 +577,7 @@ class StarRailRes:
                 if any(p in n for p in plugin_config.sr_wiki_providers)
             ]
             if overview:
-                if isinstance(overview, list):
+                if isinstance(overview, (list, tuple)):
                     overview = random.choice(overview)
                 if await self.cache(overview):
                     return (plugin_data_dir / overview).read_bytes()
@@ -285,7 +590,7 @@ class StarRailRes:
         if id in self.ResIndex["light_cones"]:
             overview = self.ResIndex["light_cones"][id].guide_overview
             if overview:
-                if isinstance(overview, list):
+                if isinstance(overview, (list, tuple)):
                     overview = random.choice(overview)
                 return self.proxy_url(f"{plugin_config.sr_wiki_url}/{overview}")
         return None
@@ -297,7 +602,7 @@ class StarRailRes:
         if id in self.ResIndex["relic_sets"]:
             overview = self.ResIndex["relic_sets"][id].guide_overview
             if overview:
-                if isinstance(overview, list):
+                if isinstance(overview, (list, tuple)):
                     overview = random.choice(overview)
                 if await self.cache(overview):
                     return (plugin_data_dir / overview).read_bytes()
@@ -310,7 +615,7 @@ class StarRailRes:
         if id in self.ResIndex["relic_sets"]:
             overview = self.ResIndex["relic_sets"][id].guide_overview
             if overview:
-                if isinstance(overview, list):
+                if isinstance(overview, (list, tuple)):
                     overview = random.choice(overview)
                 return self.proxy_url(f"{plugin_config.sr_wiki_url}/{overview}")
         return None
@@ -318,29 +623,209 @@ class StarRailRes:
     def get_font(self) -> str:
         return str(plugin_data_dir / "font" / FontFile)
 
+    def get_version(self) -> str:
+        """
+        当前资源版本，为版本文件的 sha256，版本文件不存在时为空字符串
+        """
+        if self._version is None:
+            path = plugin_data_dir / VersionFile
+            self._version = (
+                hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else ""
+            )
+        return self._version
+
     def get_data_folder(self) -> Path:
         return plugin_data_dir
 
-    def load_index_file(self, name: str, model=True) -> dict[str, Any]:
+    def load_index_file(
+        self,
+        name: str,
+        model=True,
+        snapshot: Optional[bool] = None,
+        compact: Optional[bool] = None,
+    ) -> dict[str, Any]:
+        """
+        读取索引文件
+
+        Args:
+            name: 索引名称
+            model: 是否校验为模型
+            snapshot: 是否使用二进制快照，默认由配置决定
+            compact: 是否转换为只读紧凑表示，默认由配置决定
+        """
         if name in ResFiles and (index_dir / f"{name}.json").exists():
-            with open(index_dir / f"{name}.json", encoding="utf-8") as f:
-                data = json.load(f)
+            raw = (index_dir / f"{name}.json").read_bytes()
             if not model:
-                return data
-            return type_validate_python(ResIndexType.__annotations__[name], data)
+                return json.loads(raw)
+            if snapshot is None:
+                snapshot = plugin_config.sr_res_snapshot
+            if compact is None:
+                compact = plugin_config.sr_res_compact
+            sha256 = hashlib.sha256(raw).hexdigest() if snapshot else ""
+            index = self.load_snapshot(name, sha256) if snapshot else None
+            if index is None:
+                index = type_validate_python(
+                    ResIndexType.__annotations__[name], json.loads(raw)
+                )
+                if snapshot:
+                    self.save_snapshot(name, sha256, index)
+            return to_compact(index) if compact else index
         return {}
 
-    def reload(self) -> None:
-        for name in ResFiles:
-            if name in {"nickname"}:
+    def load_snapshot(self, name: str, sha256: str) -> Optional[dict[str, Any]]:
+        """
+        读取已校验索引的快照，索引文件或模型结构变化时返回 None
+        """
+        path = snapshot_dir / f"{name}.pickle"
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                header = pickle.load(f)
+                if header != {"schema": SchemaHash, "sha256": sha256}:
+                    return None
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"索引 {name} 快照读取失败: {e}")
+            return None
+
+    def save_snapshot(self, name: str, sha256: str, index: dict[str, Any]) -> None:
+        try:
+            header = pickle.dumps({"schema": SchemaHash, "sha256": sha256})
+            data = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+            self.write_file(snapshot_dir / f"{name}.pickle", header + data)
+        except Exception as e:
+            logger.warning(f"索引 {name} 快照写入失败: {e}")
+
+    def load_indexes(
+        self, names: set[str]
+    ) -> tuple[dict[str, Any], Optional[dict[str, Any]], Optional[dict[str, Any]]]:
+        """
+        读取并校验索引文件，不修改当前索引，可在工作线程中调用
+
+        Returns:
+            索引、昵称表、昵称反查表，未请求昵称时后两项为 None
+        """
+        indexes: dict[str, Any] = {}
+        for name in names:
+            if name in {"nickname"} or name in self._index.lazy:
                 continue
-            self.ResIndex[name] = self.load_index_file(name)
-        self.Nickname = self.load_index_file("nickname", model=False)
+            indexes[name] = self.load_index_file(name)
+        if "nickname" not in names:
+            return indexes, None, None
+        nickname = self.load_index_file("nickname", model=False)
+        nickname_rev: dict[str, Any] = {}
         for type in {"characters", "light_cones", "relic_sets"}:
-            if type in self.Nickname.keys():
-                for k, v in dict(self.Nickname[type]).items():
+            if type in nickname.keys():
+                for k, v in dict(nickname[type]).items():
                     for v_item in list(v):
-                        self.NicknameRev[v_item] = k
+                        nickname_rev[v_item] = k
+        return indexes, nickname, nickname_rev
+
+    def apply_indexes(
+        self,
+        names: set[str],
+        indexes: dict[str, Any],
+        nickname: Optional[dict[str, Any]],
+        nickname_rev: Optional[dict[str, Any]],
+    ) -> None:
+        """
+        以新字典整体替换当前索引，读取方不会看到加载一半的索引
+        """
+        self._index = self._index.replace(indexes, names)
+        if nickname is not None and nickname_rev is not None:
+            self.Nickname = nickname
+            self.NicknameRev = nickname_rev
+        self._loaded = self._loaded | names
+        logger.debug(f"已加载索引: {', '.join(sorted(names))}")
+
+    def resolve_reload_names(self, names: Optional[set[str]] = None) -> set[str]:
+        if names is None:
+            names = set(ResFiles)
+        return (names | (ResFiles - self._loaded)) & ResFiles
+
+    def sweep_indexes(self) -> None:
+        """
+        释放长时间未访问的懒加载索引
+        """
+        if plugin_config.sr_res_lazy_idle_ttl <= 0:
+            return
+        if dropped := self._index.sweep(plugin_config.sr_res_lazy_idle_ttl):
+            logger.debug(f"已释放空闲索引: {', '.join(sorted(dropped))}")
+
+    def reload(self, names: Optional[set[str]] = None) -> None:
+        """
+        重新加载索引
+
+        Args:
+            names: 需要重新加载的索引名称，为空时加载全部索引；尚未加载过的索引总会被加载
+        """
+        names = self.resolve_reload_names(names)
+        self.apply_indexes(names, *self.load_indexes(names))
+
+    async def reload_async(self, names: Optional[set[str]] = None) -> None:
+        """
+        在工作线程中重新加载索引，避免 JSON 解析和模型校验阻塞事件循环
+
+        Args:
+            names: 需要重新加载的索引名称，为空时加载全部索引；尚未加载过的索引总会被加载
+        """
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+        async with self._reload_lock:
+            names = self.resolve_reload_names(names)
+            start = time.perf_counter()
+            result = await asyncio.to_thread(self.load_indexes, names)
+            self.apply_indexes(names, *result)
+            logger.debug(f"索引加载耗时 {time.perf_counter() - start:.2f}s")
+
+    def get_manifest(self, version: dict[str, Any]) -> Optional[dict[str, str]]:
+        """
+        从版本文件中读取索引文件的 sha256 清单
+
+        版本文件中 `files` 字段的键为相对仓库根目录的文件路径，
+        如 `index_min/cn/characters.json`，值为文件内容的 sha256
+        """
+        files = version.get("files")
+        if not isinstance(files, dict):
+            return None
+        manifest: dict[str, str] = {}
+        for name in ResFiles:
+            sha256 = files.get(f"index_min/cn/{name}.json")
+            if isinstance(sha256, str):
+                manifest[name] = sha256.lower()
+        return manifest or None
+
+    async def update_index_file(
+        self, name: str, semaphore: asyncio.Semaphore
+    ) -> Optional[bool]:
+        """
+        下载单个索引文件
+
+        Args:
+            name: 索引名称
+            semaphore: 限制并发下载数量
+
+        Returns:
+            文件有更新时返回 True，未修改时返回 False，下载失败时返回 None
+        """
+        filename = f"{name}.json"
+        async with semaphore:
+            logger.debug(f"正在下载索引 {filename}...")
+            start = time.perf_counter()
+            result = await self.download_file(
+                f"index/{filename}",
+                index_dir / filename,
+                self.proxy_url(f"{plugin_config.sr_wiki_url}/index_min/cn/{filename}"),
+            )
+            if result is None:
+                logger.error(f"文件 {filename} 下载失败")
+                return None
+            logger.debug(
+                f"索引 {filename} {'已更新' if result else '未修改'}，"
+                f"耗时 {time.perf_counter() - start:.2f}s"
+            )
+        return result
 
     async def update(self) -> bool:
         """
@@ -356,6 +841,11 @@ class StarRailRes:
         if not data:
             logger.error(f"文件 {VersionFile} 下载失败")
             return False
+        try:
+            version = dict(json.loads(data))
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            logger.error(f"文件 {VersionFile} 解析失败: {e}")
+            return False
         if not plugin_data_dir.exists() or not (plugin_data_dir / VersionFile).exists():
             plugin_data_dir.mkdir(parents=True, exist_ok=True)
             # 版本文件不存在，更新索引
@@ -363,35 +853,63 @@ class StarRailRes:
         else:
             with open(plugin_data_dir / VersionFile, encoding="utf-8") as f:
                 current_version = json.load(f)
-            if current_version["timestamp"] != json.loads(data)["timestamp"]:
+            if current_version.get("timestamp") != version.get("timestamp"):
                 # 版本不一致，更新索引
                 update_index = True
-        # 更新版本文件
-        with open(plugin_data_dir / VersionFile, "w", encoding="utf-8") as f:
-            f.write(data.decode("utf-8"))
         # 更新索引
         index_dir.mkdir(parents=True, exist_ok=True)
         logger.debug("正在检查索引文件是否完整")
-        # 下载索引文件
-        for name in ResFiles:
-            filename = f"{name}.json"
-            if not (index_dir / filename).exists() or update_index:
-                # 索引文件不存在或需要更新时下载
-                logger.debug(f"正在下载索引 {filename}...")
-                data = await self.download(
-                    self.proxy_url(
-                        f"{plugin_config.sr_wiki_url}/index_min/cn/{filename}"
-                    )
+        meta = self.load_meta()
+        manifest = self.get_manifest(version)
+        if manifest is not None:
+            # 版本文件包含清单时只下载哈希不一致的索引文件
+            names = [
+                name
+                for name in sorted(ResFiles)
+                if not (index_dir / f"{name}.json").exists()
+                or (
+                    name in manifest
+                    and meta.get(f"index/{name}.json", {}).get("sha256")
+                    != manifest[name]
                 )
-                if not data:
-                    logger.error(f"文件 {filename} 下载失败")
-                    status = False
-                    continue
-                with open(index_dir / filename, "wb") as f:
-                    f.write(data)
+                or (name not in manifest and update_index)
+            ]
+        else:
+            # 索引文件不存在或需要更新时下载，由条件请求和本地哈希判断是否有变化
+            names = [
+                name
+                for name in sorted(ResFiles)
+                if update_index or not (index_dir / f"{name}.json").exists()
+            ]
+        changed: set[str] = set()
+        if names:
+            start = time.perf_counter()
+            semaphore = asyncio.Semaphore(max(1, plugin_config.sr_res_concurrency))
+            results = await asyncio.gather(
+                *(self.update_index_file(name, semaphore) for name in names)
+            )
+            if None in results:
+                status = False
+            changed = {name for name, result in zip(names, results) if result}
+            logger.info(
+                f"已检查 {len(names)} 个索引文件，"
+                f"更新 {results.count(True)} 个，未修改 {results.count(False)} 个，"
+                f"失败 {results.count(None)} 个，"
+                f"耗时 {time.perf_counter() - start:.2f}s"
+            )
+            if manifest is not None:
+                for name in changed:
+                    sha256 = meta.get(f"index/{name}.json", {}).get("sha256")
+                    if name in manifest and sha256 != manifest[name]:
+                        logger.warning(f"索引 {name}.json 的 sha256 与清单不一致")
+        self.flush_meta()
         logger.info("索引文件检查完毕")
+        # 已下载的索引记录了哈希，下次更新不会再视为变化，需立即重新加载
+        await self.reload_async(changed)
         if status:
-            self.reload()
+            # 索引全部下载成功后再更新版本文件，失败时下次更新会重试
+            self.write_file(plugin_data_dir / VersionFile, data)
+            self._version = None
         # 检查字体文件是否完整
         logger.info("正在检查字体文件是否完整")
         if not font_dir.exists():
@@ -406,8 +924,10 @@ class StarRailRes:
                 logger.error(f"文件 {filename} 下载失败")
                 status = False
             else:
-                with open(font_dir / filename, "wb") as f:
-                    f.write(data)
+                self.write_file(font_dir / filename, data)
+                # 字体变化后已缓存的文字和静态图层失效
+                clear_text_cache()
+                self.templates.clear()
         logger.info("字体文件检查完毕")
         return status
 
@@ -434,4 +954,73 @@ class StarRailRes:
         for file in guide_files:
             if not await self.cache(file, force):
                 status = False
+        self.flush_meta()
         return status
+
+    def get_icon_files(self) -> list[str]:
+        """
+        列出索引中引用的全部图标和立绘文件
+        """
+        files: set[str] = {"icon/logo/bg.png", "icon/logo/cn.png"}
+        for name, fields in (
+            ("characters", ("icon", "preview", "portrait")),
+            ("character_ranks", ("icon",)),
+            ("character_skills", ("icon",)),
+            ("character_skill_trees", ("icon",)),
+            ("light_cones", ("icon", "preview", "portrait")),
+            ("relics", ("icon",)),
+            ("relic_sets", ("icon",)),
+            ("paths", ("icon",)),
+            ("elements", ("icon",)),
+            ("properties", ("icon",)),
+        ):
+            for item in self.ResIndex[name].values():
+                files.update(getattr(item, field) for field in fields)
+        files.discard("")
+        return sorted(files)
+
+    async def warmup(self) -> WarmupResult:
+        """
+        并发预下载索引中引用的全部缺失图标，受并发数和带宽上限限制
+        """
+        files = self.get_icon_files()
+        missing = [file for file in files if not (plugin_data_dir / file).exists()]
+        result: WarmupResult = {
+            "total": len(files),
+            "missing": len(missing),
+            "downloaded": 0,
+            "failed": 0,
+            "bytes": 0,
+            "elapsed": 0,
+        }
+        logger.info(f"图标预下载开始，共 {len(files)} 个文件，缺失 {len(missing)} 个")
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(max(1, plugin_config.sr_res_concurrency))
+        bandwidth = plugin_config.sr_res_warmup_bandwidth * 1024
+        step = max(1, len(missing) // 10)
+
+        async def _download(file: str) -> None:
+            async with semaphore:
+                if await self.cache(file):
+                    result["downloaded"] += 1
+                    result["bytes"] += (plugin_data_dir / file).stat().st_size
+                else:
+                    result["failed"] += 1
+                done = result["downloaded"] + result["failed"]
+                if done % step == 0 or done == len(missing):
+                    logger.info(f"图标预下载进度 {done}/{len(missing)}")
+                if bandwidth > 0:
+                    # 按平均速率限制带宽，超出时等待
+                    delay = result["bytes"] / bandwidth - (time.perf_counter() - start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+        await asyncio.gather(*(_download(file) for file in missing))
+        self.flush_meta()
+        result["elapsed"] = time.perf_counter() - start
+        logger.info(
+            f"图标预下载完成，下载 {result['downloaded']} 个，"
+            f"失败 {result['failed']} 个，共 {result['bytes'] / 1024 / 1024:.2f}MB，"
+            f"耗时 {result['elapsed']:.2f}s"
+        )
+        return result
@@ -0,0 +1,112 @@
+import threading
+from pathlib import Path
+from typing import Union, Optional
+from collections import OrderedDict
+
+from pil_utils import BuildImage
+from PIL import Image, ImageEnhance
+
+ImageKey = tuple[str, Optional[tuple[int, int]], bool, int, float]
+
+
+def image_nbytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+class ImageCache:
+    """
+    解码后图片的 LRU 缓存
+
+    以 (路径, 目标尺寸, 变换) 为键，按解码后占用的字节数限制总大小，
+    超出预算时淘汰最久未使用的图片。缓存的图片为共享对象，调用方不应原地修改。
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[ImageKey, Image.Image] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def load(
+        self,
+        path: Union[str, Path],
+        size: Optional[tuple[int, int]] = None,
+        circle: bool = False,
+        border: int = 0,
+        brightness: float = 1.0,
+    ) -> Image.Image:
+        """
+        读取图片并依次应用缩放、圆形裁剪、白色描边和亮度调整
+
+        Args:
+            path: 图片路径
+            size: 目标尺寸
+            circle: 是否裁剪为圆形
+            border: 圆形描边宽度，0 表示不描边
+            brightness: 亮度系数
+        """
+        key: ImageKey = (str(path), size, circle, border, brightness)
+        with self._lock:
+            image = self._data.get(key)
+            if image is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+        image = Image.open(path).convert("RGBA")
+        if size or circle or border:
+            build_image = BuildImage(image)
+            if size:
+                build_image = build_image.resize(size)
+            if circle:
+                build_image = build_image.circle()
+            if border:
+                build_image = build_image.draw_arc(
+                    (0, 0, build_image.width, build_image.height),
+                    0,
+                    360,
+                    width=border,
+                    fill=(255, 255, 255),
+                )
+            image = build_image.image
+        if brightness != 1.0:
+            image = ImageEnhance.Brightness(image).enhance(brightness)
+        self.put(key, image)
+        return image
+
+    def put(self, key: ImageKey, image: Image.Image) -> None:
+        nbytes = image_nbytes(image)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._nbytes -= image_nbytes(old)
+            self._data[key] = image
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._nbytes -= image_nbytes(evicted)
+
+    def invalidate(self, path: Union[str, Path]) -> None:
+        """
+        移除指定路径的全部缓存图片，用于文件更新后
+        """
+        path = str(path)
+        with self._lock:
+            for key in [k for k in self._data if k[0] == path]:
+                self._nbytes -= image_nbytes(self._data.pop(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
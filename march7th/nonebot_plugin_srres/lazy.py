@@ -0,0 +1,94 @@
+import time
+import threading
+from typing import Any, Optional
+from collections.abc import Mapping, Callable, Iterable, Iterator
+
+from nonebot.log import logger
+
+
+class LazyResIndex(Mapping[str, Any]):
+    """
+    按需加载的索引映射
+
+    常驻索引在创建时传入；懒加载索引在第一次访问时通过 loader 读取并校验，
+    空闲超过指定时间后可通过 sweep 释放，下次访问时重新加载。
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        loader: Callable[[str], dict[str, Any]],
+        lazy: Iterable[str] = (),
+        data: Optional[dict[str, Any]] = None,
+    ) -> None:
+        self._names = frozenset(names)
+        self._loader = loader
+        self._lazy = frozenset(lazy) & self._names
+        self._data: dict[str, Any] = dict(data or {})
+        self._last_access: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._names:
+            raise KeyError(name)
+        if name in self._lazy:
+            self._last_access[name] = time.monotonic()
+        try:
+            return self._data[name]
+        except KeyError:
+            pass
+        if name not in self._lazy:
+            return {}
+        with self._lock:
+            if name not in self._data:
+                start = time.perf_counter()
+                self._data[name] = self._loader(name)
+                logger.debug(
+                    f"懒加载索引 {name}，耗时 {time.perf_counter() - start:.2f}s"
+                )
+            return self._data[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def lazy(self) -> frozenset[str]:
+        return self._lazy
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._data
+
+    def replace(self, indexes: dict[str, Any], names: Iterable[str]) -> "LazyResIndex":
+        """
+        生成替换了部分索引的新映射，原映射不受影响
+
+        Args:
+            indexes: 新加载的常驻索引
+            names: 本次重新加载的全部索引名称，其中的懒加载索引会在下次访问时重新读取
+        """
+        data = {
+            k: v for k, v in self._data.items() if k not in self._lazy or k not in names
+        }
+        data.update(indexes)
+        new = LazyResIndex(self._names, self._loader, self._lazy, data)
+        new._last_access = dict(self._last_access)
+        return new
+
+    def sweep(self, idle: float) -> list[str]:
+        """
+        释放空闲时间超过 idle 秒的懒加载索引
+
+        Returns:
+            被释放的索引名称
+        """
+        now = time.monotonic()
+        dropped: list[str] = []
+        with self._lock:
+            for name in self._lazy:
+                if name in self._data and now - self._last_access.get(name, 0) > idle:
+                    del self._data[name]
+                    dropped.append(name)
+        return dropped
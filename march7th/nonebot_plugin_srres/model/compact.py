@@ -0,0 +1,63 @@
+import sys
+from typing import Any
+
+from pydantic import BaseModel
+from nonebot.compat import model_fields
+
+
+class CompactModel:
+    """
+    只读的紧凑模型，使用 __slots__ 保存字段，属性访问方式与原模型一致
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **kwargs: Any) -> None:
+        for name in self.__slots__:
+            object.__setattr__(self, name, kwargs[name])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __eq__(self, other: object) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+_compact_classes: dict[type[BaseModel], type[CompactModel]] = {}
+
+
+def compact_class(model: type[BaseModel]) -> type[CompactModel]:
+    """
+    获取模型对应的紧凑类
+    """
+    if model not in _compact_classes:
+        name = f"Compact{model.__name__}"
+        fields = tuple(field.name for field in model_fields(model))
+        cls = type(name, (CompactModel,), {"__slots__": fields, "__module__": __name__})
+        _compact_classes[model] = cls
+    return _compact_classes[model]
+
+
+def to_compact(value: Any) -> Any:
+    """
+    将模型递归转换为紧凑表示：模型转为紧凑类，列表转为元组，短字符串驻留
+    """
+    if isinstance(value, BaseModel):
+        cls = compact_class(type(value))
+        return cls(**{n: to_compact(getattr(value, n)) for n in cls.__slots__})
+    if isinstance(value, (list, tuple)):
+        return tuple(to_compact(v) for v in value)
+    if isinstance(value, dict):
+        return {to_compact(k): to_compact(v) for k, v in value.items()}
+    if isinstance(value, str) and len(value) <= 64:
+        return sys.intern(value)
+    return value
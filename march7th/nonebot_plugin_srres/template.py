@@ -0,0 +1,48 @@
+import threading
+from typing import Any
+from collections.abc import Callable, Hashable
+
+from PIL import Image
+from pil_utils import BuildImage
+
+
+class TemplateCache:
+    """
+    静态图层缓存
+
+    以 (名称, 参数) 为键保存绘制好的静态图层，资源版本或字体变化时重新绘制。
+    每次获取返回图层的副本，可直接在其上绘制动态内容。
+    """
+
+    def __init__(self) -> None:
+        self._data: dict[tuple[str, tuple], tuple[Hashable, Image.Image]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        version: Hashable,
+        name: str,
+        draw: Callable[..., BuildImage],
+        *args: Any,
+    ) -> BuildImage:
+        """
+        获取静态图层
+
+        Args:
+            version: 资源版本，与缓存不一致时重新绘制
+            name: 图层名称
+            draw: 绘制函数，只能依赖参数、字体和资源文件
+            args: 绘制函数的参数，同时作为缓存键的一部分
+        """
+        key = (name, args)
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or entry[0] != version:
+            entry = (version, draw(*args).image)
+            with self._lock:
+                self._data[key] = entry
+        return BuildImage(entry[1].copy())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,197 @@
+import math
+from functools import lru_cache
+from typing import Any, Union, Optional
+
+from PIL import Image, ImageColor
+from pil_utils import BuildImage, Text2Image, text2image
+from pil_utils.types import ColorType, FontWeight, HAlignType, VAlignType
+
+XYType = Union[tuple[float, float], tuple[float, float, float, float]]
+
+
+def is_opaque(color: Optional[ColorType]) -> bool:
+    if color is None:
+        return True
+    if isinstance(color, str):
+        color = ImageColor.getrgb(color)
+    return len(color) < 4 or color[3] == 255  # type: ignore
+
+
+@lru_cache(maxsize=4096)
+def get_layout(
+    text: str,
+    fontsize: int,
+    fill: ColorType,
+    weight: FontWeight,
+    stroke_width: int,
+    stroke_fill: Optional[ColorType],
+    fontname: str,
+) -> Text2Image:
+    """
+    文字排版结果，字体对象由 pil_utils 按字号缓存
+    """
+    return Text2Image.from_text(
+        text,
+        fontsize,
+        weight=weight,
+        fill=fill,
+        stroke_width=stroke_width,
+        stroke_fill=stroke_fill,
+        fontname=fontname,
+    )
+
+
+@lru_cache(maxsize=4096)
+def fit_layout(
+    text: str,
+    width: float,
+    height: float,
+    max_fontsize: int,
+    min_fontsize: int,
+    fill: ColorType,
+    weight: FontWeight,
+    stroke_ratio: float,
+    stroke_fill: Optional[ColorType],
+    fontname: str,
+) -> tuple[Text2Image, int]:
+    """
+    从最大字号开始逐步缩小，返回能放入指定区域的排版结果和字号
+    """
+    fontsize = max_fontsize
+    while True:
+        layout = get_layout(
+            text,
+            fontsize,
+            fill,
+            weight,
+            int(fontsize * stroke_ratio),
+            stroke_fill,
+            fontname,
+        )
+        if layout.width <= width and layout.height <= height:
+            return layout, fontsize
+        fontsize -= 1
+        if fontsize < min_fontsize:
+            raise ValueError("在指定的区域和字体大小范围内画不下这段文字")
+
+
+@lru_cache(maxsize=2048)
+def get_sprite(
+    layout: Text2Image, offset_x: float, offset_y: float, stroke: bool
+) -> tuple[Image.Image, Optional[Image.Image]]:
+    """
+    文字的透明背景图片，offset 为绘制位置的小数部分
+
+    无描边时 Pillow 按覆盖率逐通道混合，绘制到透明背景上得到预乘颜色，
+    需转换为普通颜色并以覆盖率为蒙版粘贴；有描边时直接叠加即可。
+
+    Returns:
+        文字图片和粘贴用的蒙版，蒙版为 None 时使用叠加
+    """
+    sprite = Image.new("RGBA", (layout.width + 1, layout.height + 1))
+    layout.draw_on_image(sprite, (offset_x, offset_y))
+    if stroke:
+        return sprite, None
+    mask = sprite.getchannel("A")
+    color = Image.frombytes("RGBa", sprite.size, sprite.tobytes()).convert("RGBA")
+    color.putalpha(255)
+    return color, mask
+
+
+def draw_text(
+    image: BuildImage,
+    xy: XYType,
+    text: str,
+    *,
+    fontsize: int = 16,
+    max_fontsize: int = 30,
+    min_fontsize: int = 12,
+    fill: ColorType = "black",
+    weight: FontWeight = "normal",
+    halign: HAlignType = "center",
+    valign: VAlignType = "center",
+    stroke_ratio: float = 0,
+    stroke_fill: Optional[ColorType] = None,
+    fontname: str = "",
+) -> BuildImage:
+    """
+    与 BuildImage.draw_text 参数和效果一致，缓存排版结果和文字图片
+
+    Args:
+        image: 目标图片
+        xy: 文字位置或文字区域，传入 4 个参数时为文字区域
+        text: 文字
+    """
+    if isinstance(fill, list):
+        fill = tuple(fill)
+    if len(xy) == 2:
+        stroke_width = int(fontsize * stroke_ratio)
+        layout = get_layout(
+            text, fontsize, fill, weight, stroke_width, stroke_fill, fontname
+        )
+        x, y = xy[0], xy[1]
+    else:
+        left, top, right, bottom = xy  # type: ignore
+        width = right - left
+        height = bottom - top
+        layout, fontsize = fit_layout(
+            text,
+            width,
+            height,
+            max_fontsize,
+            min_fontsize,
+            fill,
+            weight,
+            stroke_ratio,
+            stroke_fill,
+            fontname,
+        )
+        stroke_width = int(fontsize * stroke_ratio)
+        x = left
+        if halign == "center":
+            x += (width - layout.width) / 2
+        elif halign == "right":
+            x += width - layout.width
+        y = top
+        if valign == "center":
+            y += (height - layout.height) / 2
+        elif valign == "bottom":
+            y += height - layout.height
+    pos_x, pos_y = math.floor(x), math.floor(y)
+    if (
+        image.image.mode != "RGBA"
+        or not is_opaque(fill)
+        or not is_opaque(stroke_fill)
+        or pos_x < 0
+        or pos_y < 0
+        or pos_x + layout.width + 1 > image.width
+        or pos_y + layout.height + 1 > image.height
+    ):
+        # 半透明颜色直接绘制与叠加的混合方式不同，超出边界时也直接绘制
+        layout.draw_on_image(image.image, (x, y))
+        return image
+    sprite, mask = get_sprite(layout, x - pos_x, y - pos_y, stroke_width > 0)
+    if mask is None:
+        image.image.alpha_composite(sprite, (pos_x, pos_y))
+    else:
+        image.image.paste(sprite, (pos_x, pos_y), mask)
+    return image
+
+
+@lru_cache(maxsize=256)
+def _text_image(text: str, items: tuple[tuple[str, Any], ...]) -> Image.Image:
+    return text2image(text, **dict(items))
+
+
+def text_image(text: str, **kwargs: Any) -> Image.Image:
+    """
+    缓存的 text2image，返回的图片为共享对象，不应原地修改
+    """
+    return _text_image(text, tuple(sorted(kwargs.items())))
+
+
+def clear_text_cache() -> None:
+    get_layout.cache_clear()
+    fit_layout.cache_clear()
+    get_sprite.cache_clear()
+    _text_image.cache_clear()
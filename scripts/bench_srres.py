@@ -0,0 +1,128 @@
+"""
+星铁资源索引离线性能测试
+
+将已下载的索引复制到临时目录后测试，不影响运行中的 bot：
+
+    python scripts/bench_srres.py <nonebot_plugin_srres 数据目录>
+"""
+
+import gc
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import nonebot
+from nonebot.log import logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def bench_load(srres, names: list[str], rounds: int) -> dict[str, tuple[float, float]]:
+    """
+    比较从 JSON 校验加载与从快照加载索引的耗时
+
+    Returns:
+        索引名称到 (JSON 耗时, 快照耗时) 的映射，单位为秒，取多轮最小值
+    """
+    result: dict[str, tuple[float, float]] = {}
+    for name in names:
+        # 确保快照存在
+        srres.load_index_file(name, snapshot=True)
+        json_time = snapshot_time = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            srres.load_index_file(name, snapshot=False)
+            json_time = min(json_time, time.perf_counter() - start)
+            start = time.perf_counter()
+            srres.load_index_file(name, snapshot=True)
+            snapshot_time = min(snapshot_time, time.perf_counter() - start)
+        result[name] = (json_time, snapshot_time)
+    return result
+
+
+def bench_memory(srres, names: list[str]) -> dict[str, tuple[int, int]]:
+    """
+    比较索引使用 pydantic 模型与紧凑表示时的内存占用
+
+    Returns:
+        索引名称到 (模型字节数, 紧凑表示字节数) 的映射
+    """
+    result: dict[str, tuple[int, int]] = {}
+    tracemalloc.start()
+    try:
+        for name in names:
+            sizes: list[int] = []
+            for compact in (False, True):
+                gc.collect()
+                before = tracemalloc.get_traced_memory()[0]
+                index = srres.load_index_file(name, compact=compact)
+                gc.collect()
+                sizes.append(tracemalloc.get_traced_memory()[0] - before)
+                del index
+            result[name] = (sizes[0], sizes[1])
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="星铁资源索引性能测试")
+    parser.add_argument(
+        "data_dir", type=Path, help="nonebot_plugin_srres 的数据目录，包含 index 文件夹"
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="加载耗时测试轮数")
+    args = parser.parse_args()
+    if not (args.data_dir / "index").is_dir():
+        parser.error(f"{args.data_dir / 'index'} 不存在，请先更新游戏资源列表")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(
+            args.data_dir / "index",
+            Path(tmp) / "data" / "nonebot_plugin_srres" / "index",
+        )
+        nonebot.init(
+            localstore_cache_dir=Path(tmp) / "cache",
+            localstore_config_dir=Path(tmp) / "config",
+            localstore_data_dir=Path(tmp) / "data",
+        )
+        nonebot.load_plugin("march7th.nonebot_plugin_srres")
+        from march7th.nonebot_plugin_srres import srres
+        from march7th.nonebot_plugin_srres.data_source import ResFiles, index_dir
+
+        names = [
+            name
+            for name in sorted(ResFiles - {"nickname"})
+            if (index_dir / f"{name}.json").exists()
+        ]
+
+        load = bench_load(srres, names, args.rounds)
+        logger.info("索引加载耗时 (JSON / 快照)")
+        for name, (json_time, snapshot_time) in sorted(
+            load.items(), key=lambda x: x[1][0], reverse=True
+        ):
+            logger.info(
+                f"{name}: {json_time * 1000:.1f}ms / {snapshot_time * 1000:.1f}ms"
+            )
+        json_total = sum(i[0] for i in load.values())
+        snapshot_total = sum(i[1] for i in load.values())
+        logger.info(f"合计: {json_total * 1000:.1f}ms / {snapshot_total * 1000:.1f}ms")
+
+        memory = bench_memory(srres, names)
+        logger.info("索引内存占用 (模型 / 紧凑表示)")
+        for name, (model_bytes, compact_bytes) in sorted(
+            memory.items(), key=lambda x: x[1][0], reverse=True
+        ):
+            logger.info(
+                f"{name}: {model_bytes / 1024:.1f}KB / {compact_bytes / 1024:.1f}KB"
+            )
+        model_total = sum(i[0] for i in memory.values())
+        compact_total = sum(i[1] for i in memory.values())
+        logger.info(f"合计: {model_total / 1024:.1f}KB / {compact_total / 1024:.1f}KB")
+
+
+if __name__ == "__main__":
+    main()